@@ -0,0 +1,58 @@
+import math
+import numpy as np
+
+"""
+Vectorized validation of many completed boards at once (requires numpy)
+Each cell value v becomes the bit 1 << v. A unit of row_length cells with values in
+1..row_length holds every digit exactly once if and only if OR-ing its bits sets all
+row_length bits, so each check is a single bitwise_or.reduce over the batch
+
+"""
+
+'''
+Checks a batch of completed boards
+
+Parameters:
+grids is an array-like of shape (N, row_length, row_length) holding values 1..row_length
+
+Return: numpy array of N booleans (True where the board is a valid solution)
+'''
+def check_boards(grids):
+    grids = np.asarray(grids)
+    if grids.ndim != 3 or grids.shape[1] != grids.shape[2]:
+        raise ValueError("expected an array of shape (N, row_length, row_length), got %s" % (grids.shape,))
+    count, n = grids.shape[0], grids.shape[1]
+    box = math.isqrt(n)
+    if box * box != n:
+        raise ValueError("row_length must be a perfect square, got %d" % n)
+
+    # out of range values (including 0 for empty) fail the board before the shift
+    in_range = ((grids >= 1) & (grids <= n)).reshape(count, n * n).all(axis=1)
+    dtype = np.uint16 if n < 16 else np.uint64
+    bits = np.left_shift(np.ones(1, dtype), np.where(grids <= n, grids, 0).astype(dtype))
+    full = np.array(((1 << n) - 1) << 1, dtype)
+
+    rows_ok = (np.bitwise_or.reduce(bits, axis=2) == full).all(axis=1)
+    cols_ok = (np.bitwise_or.reduce(bits, axis=1) == full).all(axis=1)
+    # (N, band, row in band, stack, col in stack) -> (N, band, stack, box_length * box_length)
+    boxes = bits.reshape(count, box, box, box, box).transpose(0, 1, 3, 2, 4).reshape(count, n, n)
+    boxes_ok = (np.bitwise_or.reduce(boxes, axis=2) == full).all(axis=1)
+    return in_range & rows_ok & cols_ok & boxes_ok
+
+'''
+Stacks PackedBoards (or 2D lists) into a uint8 array for check_boards
+PackedBoards are copied straight from their bytes with no per-cell Python work
+
+Parameters:
+boards is a list of PackedBoards or 2D lists of the same size
+
+Return: numpy array of shape (N, row_length, row_length)
+'''
+def to_array(boards):
+    if not boards:
+        return np.zeros((0, 9, 9), np.uint8)
+    if hasattr(boards[0], "cells"):
+        n = boards[0].row_length
+        data = b"".join(board.cells for board in boards)
+        return np.frombuffer(data, np.uint8).reshape(len(boards), n, n)
+    return np.array(boards, np.uint8)
@@ -0,0 +1,287 @@
+import argparse
+import cProfile
+import json
+import math
+import platform
+import pstats
+import random
+import sys
+import time
+from constants import DIFFICULTIES, ROW_LENGTH
+from sudoku_generator import SudokuGenerator, generate_sudoku, scale_difficulty
+from board_state import BoardState
+from solver import solve
+
+"""
+Benchmarks the generator and board hot paths
+Times fill_values, remove_cells, generate_sudoku end to end, BoardState/Board construction,
+and check_board for every difficulty and board size, and reports p50/p95/p99 and throughput.
+Results are written as JSON, and --compare checks them against an earlier run so slowdowns
+in the generator can be caught before they ship
+Board (pygame) is only timed when pygame is installed
+
+Example:
+python bench.py --sizes 9,16 --repeat 50 --unique --seed 1 -o bench.json
+python bench.py --repeat 50 --unique --seed 1 --compare bench.json
+python bench.py --cases generate_sudoku --profile generate.prof
+
+"""
+
+
+try:
+    import pygame
+    from board import Board
+except ImportError:
+    Board = None
+
+'''
+Returns the value below which p percent of the sorted times fall (nearest rank)
+
+Parameters:
+times is a sorted list of seconds
+p is the percentile, 0-100
+
+Return: float
+'''
+def percentile(times, p):
+    rank = max(1, math.ceil(p / 100 * len(times)))
+    return times[rank - 1]
+
+'''
+Summarizes the times of one case
+
+Parameters:
+times is a list of seconds, one per call
+
+Return: dict
+'''
+def summarize(times):
+    times = sorted(times)
+    total = sum(times)
+    return {
+        "count": len(times),
+        "mean": total / len(times),
+        "min": times[0],
+        "p50": percentile(times, 50),
+        "p95": percentile(times, 95),
+        "p99": percentile(times, 99),
+        "max": times[-1],
+        "per_second": len(times) / total if total > 0 else math.inf,
+    }
+
+'''
+Times repeat calls of run, calling setup before each one outside of the timing
+
+Parameters:
+setup is a function returning the argument for run
+run is the function to time
+repeat is the number of calls
+
+Return: list[float] (seconds per call)
+'''
+def time_calls(setup, run, repeat):
+    times = []
+    for i in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+'''
+Makes a filled generator for the remove_cells case
+
+Parameters:
+size is the board size
+removed is the number of cells to remove
+unique is passed on to SudokuGenerator
+rng is the random.Random to draw from
+
+Return: SudokuGenerator
+'''
+def filled_generator(size, removed, unique, rng):
+    sudoku = SudokuGenerator(size, removed, unique, rng)
+    sudoku.fill_values()
+    return sudoku
+
+'''
+Makes a board state filled with its solution for the check_board case
+
+Parameters:
+puzzle is a 2D list
+removed is the difficulty the puzzle was made with
+
+Return: BoardState
+'''
+def solved_state(puzzle, removed):
+    state = BoardState(removed, puzzle=puzzle)
+    solution = state.solution or solve(puzzle)[0]
+    for i in range(state.row_length):
+        for j in range(state.row_length):
+            if state.board[i][j] == 0:
+                state.select(i, j)
+                state.sketch(solution[i][j])
+                state.place_number()
+    return state
+
+'''
+Runs every selected case for one board size and difficulty
+
+Parameters:
+cases is the set of case names to run
+size is the board size
+name is the difficulty name
+repeat is the number of calls per case
+unique is passed on to the generator
+rng is the random.Random every puzzle is drawn from
+
+Return: list[dict] (one result per case)
+'''
+def bench_difficulty(cases, size, name, repeat, unique, rng):
+    removed = scale_difficulty(DIFFICULTIES[name], size)
+    # puzzles for the board cases are made up front so they don't count as board time
+    puzzles = [generate_sudoku(size, removed, unique, rng=rng) for i in range(min(repeat, 10))]
+    puzzle_of = lambda: puzzles[rng.randrange(len(puzzles))]
+    timings = {
+        "fill_values": lambda: time_calls(lambda: SudokuGenerator(size, removed, unique, rng), lambda sudoku: sudoku.fill_values(), repeat),
+        "remove_cells": lambda: time_calls(lambda: filled_generator(size, removed, unique, rng), lambda sudoku: sudoku.remove_cells(), repeat),
+        "generate_sudoku": lambda: time_calls(lambda: None, lambda arg: generate_sudoku(size, removed, unique, rng=rng), repeat),
+        "BoardState.__init__": lambda: time_calls(puzzle_of, lambda puzzle: BoardState(removed, puzzle=puzzle), repeat),
+        "check_board": lambda: time_calls(lambda: solved_state(puzzle_of(), removed), lambda state: state.check_board(), repeat),
+    }
+    if Board is not None:
+        screen = pygame.Surface((720, 720))
+        timings["Board.__init__"] = lambda: time_calls(puzzle_of, lambda puzzle: Board(720, 720, screen, removed, puzzle=puzzle), repeat)
+
+    results = []
+    for case, timing in timings.items():
+        if case in cases:
+            result = {"case": case, "size": size, "difficulty": name, "removed": removed}
+            result.update(summarize(timing()))
+            results.append(result)
+    return results
+
+'''
+Prints results as a table
+
+Parameters:
+results is the list of result dicts
+out is the file to print to
+
+Return: None
+'''
+def print_table(results, out):
+    print("%-20s %4s %-7s %10s %10s %10s %10s %10s" % ("case", "size", "level", "p50 ms", "p95 ms", "p99 ms", "max ms", "per sec"), file=out)
+    for r in results:
+        print("%-20s %4d %-7s %10.3f %10.3f %10.3f %10.3f %10.1f" % (r["case"], r["size"], r["difficulty"], r["p50"] * 1000,
+              r["p95"] * 1000, r["p99"] * 1000, r["max"] * 1000, r["per_second"]), file=out)
+
+'''
+Compares results with an earlier run by p50, printing every case that got slower than threshold
+
+Parameters:
+results is the list of result dicts
+baseline is the JSON written by an earlier run
+threshold is the p50 ratio that counts as a regression (e.g. 1.2 for 20% slower)
+out is the file to print to
+
+Return: int (the number of regressions)
+'''
+def compare(results, baseline, threshold, out):
+    old = {(r["case"], r["size"], r["difficulty"]): r for r in baseline["results"]}
+    regressions = 0
+    for r in results:
+        before = old.get((r["case"], r["size"], r["difficulty"]))
+        if before is None or before["p50"] == 0:
+            continue
+        ratio = r["p50"] / before["p50"]
+        if ratio > threshold:
+            regressions += 1
+            print("slower: %s size %d %s p50 %.3f ms -> %.3f ms (%.2fx)" % (r["case"], r["size"], r["difficulty"],
+                  before["p50"] * 1000, r["p50"] * 1000, ratio), file=out)
+    return regressions
+
+'''
+Parses a comma separated list of names or ints
+
+Parameters:
+text is the list from the command line
+kind is int or str
+
+Return: list
+'''
+def parse_list(text, kind=str):
+    return [kind(part.strip()) for part in text.split(",") if part.strip()]
+
+'''
+Command line entry point
+
+Parameters:
+argv is the list of command line arguments (defaults to sys.argv[1:])
+
+Return: int (exit status, 1 if --compare found a regression)
+'''
+def main(argv=None):
+    all_cases = ["fill_values", "remove_cells", "generate_sudoku", "BoardState.__init__", "Board.__init__", "check_board"]
+    parser = argparse.ArgumentParser(description="Benchmark sudoku generation and board operations.")
+    parser.add_argument("--sizes", type=lambda text: parse_list(text, int), default=[ROW_LENGTH], help="board sizes, e.g. 9,16 (default: 9)")
+    parser.add_argument("--difficulties", type=parse_list, default=list(DIFFICULTIES), help="e.g. easy,hard (default: all)")
+    parser.add_argument("--cases", type=parse_list, default=all_cases, help="cases to run (default: all of %s)" % ",".join(all_cases))
+    parser.add_argument("--repeat", type=int, default=20, help="calls per case")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the puzzles, the same seed times the same work")
+    parser.add_argument("--unique", action="store_true", help="generate puzzles with one solution, like the game does")
+    parser.add_argument("--profile", default=None, help="write cProfile stats of the whole run to this file")
+    parser.add_argument("--compare", default=None, help="JSON from an earlier run to check for slowdowns")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p50 ratio that counts as slower for --compare (default: 1.2)")
+    parser.add_argument("-o", "--output", default=None, help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("repeat must be >= 1")
+    for size in args.sizes:
+        if size < 4 or math.isqrt(size) ** 2 != size:
+            parser.error("sizes must be perfect squares of at least 4")
+    for name in args.difficulties:
+        if name not in DIFFICULTIES:
+            parser.error("unknown difficulty '%s'" % name)
+    for case in args.cases:
+        if case not in all_cases:
+            parser.error("unknown case '%s'" % case)
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    results = []
+    for size in args.sizes:
+        for name in args.difficulties:
+            results.extend(bench_difficulty(set(args.cases), size, name, args.repeat, args.unique, rng))
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("tottime").print_stats(15)
+
+    print_table(results, sys.stdout)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": seed,
+            "repeat": args.repeat,
+            "unique": args.unique,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold, sys.stdout):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,205 +1,212 @@
 from constants import *
 import pygame
 from cell import Cell
-from sudoku_generator import generate_sudoku
+from board_state import BoardState
 
-class Board():
+class Board(BoardState):
     '''
-	create a sudoku board - initialize class variables and set up the 2D board
+	create a sudoku board - the pygame renderer on top of the BoardState game logic
 	This should initialize:
+	super()             - the board values, sketches, notes, selection, and conflict counters
 	self.width          - the width of the board in pixels
 	self.height         - the height of the board in pixels
 	self.screen         - the pygame surface to render to
-	self.board          - a 2D list representing the values
-    self.count          - the number of nonzero cells
-    self.cells          - a 2D list of cell objects
-    self.orig_board     - a 2D list representing the original board with cells removed
-    self.selected_cell  - the current cell object
+    self.cells          - a 2D list of cell objects mirroring the state for drawing
+    self.dirty_rects    - screen rects that changed since the last draw
+    self.static_layer   - cached surface with the grid lines and givens, None until drawn
 
 	Parameters:
     width is the board width in pixels
     height is the board height in pixels
     screen is the pygame surface to render to
     difficulty is the number of board values to be removed
+    pool is an optional PuzzlePool to take the puzzle from instead of generating it
+    puzzle is an optional 2D list to play instead of a new puzzle
+    row_length is the size of the board to generate (see BoardState)
+    solution is the optional solved board of puzzle (see BoardState)
 
 	Return:	None
     '''
-    def __init__(self, width, height, screen, difficulty):
+    def __init__(self, width, height, screen, difficulty, pool=None, puzzle=None, row_length=ROW_LENGTH, solution=None):
+        super().__init__(difficulty, pool, puzzle, row_length, solution)
         self.width = width
         self.height = height
         self.screen = screen
-        self.difficulty = difficulty
-
-        self.board = generate_sudoku(ROW_LENGTH, difficulty)
-        self.count = ROW_LENGTH ** 2 - difficulty
+        self.dirty_rects = []
         self.cells = []
         temp = []
-        for i in range(ROW_LENGTH):
-            for j in range(ROW_LENGTH):
-                temp.append(Cell(self.board[i][j], i, j, screen))
+        for i in range(self.row_length):
+            for j in range(self.row_length):
+                temp.append(Cell(self.board[i][j], i, j, screen, self.dirty_rects, self.row_length))
             self.cells.append(temp)
             temp = []
-        self.orig_board = [row[:] for row in self.board]
-        self.selected_cell = None
+        self.static_layer = None
 
     '''
-	Draws the board lines, cells, and selected outline
+	The selected cell object, or None
 
-	Parameters: None
-	Return: None
+	Return: Cell or None
     '''
-    def draw(self):
-        # draws the lines for the board
-        for i in range(ROW_LENGTH+1):
-            # thicker lines for line 0, 3, 6, and 9
-            board_line_width = 3 if i % BOX_LENGTH == 0 else 1
-            pygame.draw.line(self.screen, BLACK, (0, self.width/ROW_LENGTH*i), (self.width, self.width/ROW_LENGTH*i), board_line_width)
-            pygame.draw.line(self.screen, BLACK, (self.height/ROW_LENGTH*i, 0), (self.height/ROW_LENGTH*i, self.height), board_line_width)
-        
-        # draws cells
-        for i in range(ROW_LENGTH):
-            for j in range(ROW_LENGTH):
-                # determines whether user entered
-                if self.orig_board[i][j] == 0:
-                    self.cells[i][j].draw(True)
-                else:
-                    self.cells[i][j].draw()
-        
-        # draws selected cell outline
-        if self.selected_cell != None:
-            pygame.draw.rect(self.screen, RED, self.selected_cell.rect, SELECT_LINE_WIDTH)
+    @property
+    def selected_cell(self):
+        if self.selected is None:
+            return None
+        return self.cells[self.selected[0]][self.selected[1]]
 
     '''
-	Sets the selected cell to one in the cells 2D list
+	Copies the state of (row, col) into its cell, which marks it for redrawing
 
 	Parameters:
-    row is the cell row
-    col is the cell column
+    row and col are the cell position
 	Return: None
     '''
-    def select(self, row, col):
-        self.selected_cell = self.cells[row][col]
+    def cell_changed(self, row, col):
+        self.cells[row][col].set_cell_value(self.board[row][col])
+        self.cells[row][col].set_sketched_value(self.sketches[row][col])
+        self.cells[row][col].set_notes(self.notes[row * self.row_length + col])
 
     '''
-	Uses click position to determine which cell was selected
+	Marks the row, col, and box of (row, col) as changed
+    Used when a value changes, since that can change the conflict color of any cell in them
 
 	Parameters:
-    x is the horizontal pixel position
-    y is the vertical pixel position
-	Return: tuple(x, y) or None
+    row and col are the cell position
+	Return: None
     '''
-    def click(self, x, y):
-        if x > 0 and x < self.width and y > 0 and y < self.height:
-            row = int(y//(self.height/ROW_LENGTH))
-            col = int(x//(self.width/ROW_LENGTH))
-            self.select(row, col)
-            return (int(y//(self.height/ROW_LENGTH)), int(x//(self.width/ROW_LENGTH)))
-        else:
-            return None
+    def units_changed(self, row, col):
+        n = self.row_length
+        box = self.box_length
+        box_row, box_col = self.tables.box_start[self.box_of[row][col]]
+        self.dirty_rects.append(self.cells[row][0].rect.union(self.cells[row][n-1].rect))
+        self.dirty_rects.append(self.cells[0][col].rect.union(self.cells[n-1][col].rect))
+        self.dirty_rects.append(self.cells[box_row][box_col].rect.union(self.cells[box_row+box-1][box_col+box-1].rect))
 
     '''
-	Clears the currently selected cell (if possible)
+	Marks the old and new selected cells for redrawing
 
-	Parameters: None
+	Parameters:
+    old is the previous (row, col) or None
 	Return: None
     '''
-    def clear(self):
-        if self.orig_board[self.selected_cell.row][self.selected_cell.col] == 0:
-            if self.selected_cell.value != 0:
-                self.selected_cell.value = 0
-                self.count -= 1
-            self.selected_cell.sketch_value = 0
-            self.update_board()
+    def selection_changed(self, old):
+        if old is not None:
+            self.dirty_rects.append(self.cells[old[0]][old[1]].rect)
+        self.dirty_rects.append(self.selected_cell.rect)
 
     '''
-	Sets the currently selected cell's sketch value
+	Copies every cell from the state and marks the whole board for redrawing
 
-	Parameters:
-    value is the number input by the keyboard to be sketched
+	Parameters: None
 	Return: None
     '''
-    def sketch(self, value):
-        if self.selected_cell.value == 0:
-            self.selected_cell.set_sketched_value(value)
+    def board_changed(self):
+        for i in range(self.row_length):
+            for j in range(self.row_length):
+                self.cells[i][j].value = self.board[i][j]
+                self.cells[i][j].sketch_value = self.sketches[i][j]
+                self.cells[i][j].notes = self.notes[i * self.row_length + j]
+        self.dirty_rects.append(pygame.Rect(0, 0, self.width, self.height))
 
     '''
-	Places the currently selected cell's sketch value as the main value and
-    clears the selected cell's sketch value
+	Returns the screen rects that changed since the last call and forgets them
 
 	Parameters: None
-	Return: None
+	Return: list[pygame.Rect]
     '''
-    def place_number(self):
-        if self.selected_cell.sketch_value != 0:
-            self.selected_cell.value = self.selected_cell.sketch_value
-            self.selected_cell.sketch_value = 0
-            self.count += 1
-            self.update_board()
+    def pop_dirty_rects(self):
+        rects = self.dirty_rects[:]
+        # cleared in place since the cells share this list
+        del self.dirty_rects[:]
+        return rects
 
     '''
-	Copies values from the original board to the current board
+	Renders the parts of the board that never change during a puzzle (background,
+    lines, and givens) to a surface, so draw only has to blit it
 
 	Parameters: None
 	Return: None
     '''
-    def reset_to_original(self):
-        self.board = [row[:] for row in self.orig_board]
-        for i in range(ROW_LENGTH):
-            for j in range(ROW_LENGTH):
-                self.cells[i][j].value = self.board[i][j]
-                self.cells[i][j].sketch_value = 0
-        self.count = ROW_LENGTH ** 2 - self.difficulty
+    def build_static_layer(self):
+        # the thick outer lines spill 2 pixels past the right and bottom edges
+        self.static_layer = pygame.Surface((self.width + 2, self.height + 2))
+        self.static_layer.fill(WHITE)
+        n = self.row_length
+        # draws the lines for the board
+        for i in range(n+1):
+            # thicker lines around the boxes (line 0, 3, 6, and 9 on 9x9)
+            board_line_width = 3 if i % self.box_length == 0 else 1
+            pygame.draw.line(self.static_layer, BLACK, (0, self.width/n*i), (self.width, self.width/n*i), board_line_width)
+            pygame.draw.line(self.static_layer, BLACK, (self.height/n*i, 0), (self.height/n*i, self.height), board_line_width)
+        # draws the givens
+        for i in range(n):
+            for j in range(n):
+                if self.orig_board[i][j] != 0:
+                    self.cells[i][j].draw(False, False, self.static_layer)
 
     '''
-	Determines if the board is full (no 0s left)
+	Changes the board size in pixels, moving the cells and dropping the cached static layer
 
-	Parameters: None
-	Return: boolean
+	Parameters:
+    width is the board width in pixels
+    height is the board height in pixels
+	Return: None
     '''
-    def is_full(self):
-        if self.count == ROW_LENGTH ** 2:
-            return True
-        return False
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+        for row in self.cells:
+            for cell in row:
+                cell.resize(width, height)
+        self.static_layer = None
+        self.dirty_rects.append(pygame.Rect(0, 0, width, height))
 
     '''
-	Updates the board with the selected cell's value
-    Should only be used after changing a cell value
+	Draws the board lines, cells, and selected outline
+    The lines and givens come from the cached static layer, only user values,
+    sketches, notes, conflicting givens, and the selection are drawn each time
+    User values are red when they conflict, or with SHOW_MISTAKES when they differ from the solution
+    When area is given only the cells touching it are drawn, the caller should clip to it
 
-	Parameters: None
+	Parameters:
+    area is an optional pygame rect to redraw
 	Return: None
     '''
-    def update_board(self):
-        row = self.selected_cell.row
-        col = self.selected_cell.col
-        self.board[row][col] = self.selected_cell.value
+    def draw(self, area=None):
+        if self.static_layer is None:
+            self.build_static_layer()
+        if area is None:
+            self.screen.blit(self.static_layer, (0, 0))
+        else:
+            self.screen.blit(self.static_layer, area, area)
+
+        # draws cells
+        for i in range(self.row_length):
+            for j in range(self.row_length):
+                if area is not None and not area.colliderect(self.cells[i][j].rect):
+                    continue
+                # givens are already on the static layer unless they need the conflict color
+                if self.orig_board[i][j] == 0:
+                    self.cells[i][j].draw(True, self.is_conflict(i, j) or (SHOW_MISTAKES and self.is_wrong(i, j)))
+                elif self.is_conflict(i, j):
+                    self.cells[i][j].draw(False, True)
+
+        # draws selected cell outline
+        if self.selected_cell != None:
+            pygame.draw.rect(self.screen, RED, self.selected_cell.rect, SELECT_LINE_WIDTH)
 
     '''
-	Checks if the board is full and all values are correct
-    Uses sets to determine if each of one number 1-9 is in each row, col, and box
+	Uses click position to determine which cell was selected
 
-	Parameters: None
-	Return: boolean
-    '''
-    def check_board(self):       
-        # check row and col
-        temp_row = []
-        temp_col = []
-        for i in range (ROW_LENGTH):
-            temp_row = []
-            temp_col = []
-            for j in range(ROW_LENGTH):
-                temp_col.append(self.board[i][j])
-                temp_row.append(self.board[j][i])
-            if len(set(temp_col)) != ROW_LENGTH or len(set(temp_row)) != ROW_LENGTH:
-                return False
-        
-        # check box
-        for i in range(BOX_LENGTH):
-            for j in range(BOX_LENGTH):
-                temp_box = []
-                for k in range(BOX_LENGTH):
-                    for l in range(BOX_LENGTH):
-                        temp_box.append(self.board[i*BOX_LENGTH+k][j*BOX_LENGTH+l])
-                if len(set(temp_box)) != ROW_LENGTH:
-                    return False
-        return True
+	Parameters:
+    x is the horizontal pixel position
+    y is the vertical pixel position
+	Return: tuple(x, y) or None
+    '''
+    def click(self, x, y):
+        if x > 0 and x < self.width and y > 0 and y < self.height:
+            row = int(y//(self.height/self.row_length))
+            col = int(x//(self.width/self.row_length))
+            self.select(row, col)
+            return (row, col)
+        else:
+            return None
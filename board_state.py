@@ -0,0 +1,697 @@
+import math
+from collections import namedtuple
+from constants import *
+from sudoku_generator import generate_puzzle
+from solver import solve
+from lookup_tables import get_tables
+from grader import Grader
+
+# action is "sketch", "note", "place", "clear", "fill", or "load" with the (row, col) and value it was
+# called with, changes is a tuple of (flat index, (value, sketch, notes) before, the same after)
+Move = namedtuple("Move", ["action", "row", "col", "value", "changes"])
+
+# technique is a grader technique name, "mistake" for a placed value that differs from the
+# solution, or "guess" when no technique makes progress and the value comes from the solution
+Hint = namedtuple("Hint", ["row", "col", "num", "technique"])
+
+class BoardState():
+    '''
+	The game state of a sudoku board with no rendering, so it can be used without pygame
+    (batch tools, tests, or a server). board.Board adds the pygame drawing on top
+    This should initialize:
+	self.row_length     - the number of rows/columns of the board
+	self.box_length     - the number of rows/columns of each box
+    self.tables         - the lookup tables of the board size (see lookup_tables.py)
+    self.units          - every row, col, and box as a list of flat indices
+    self.peers          - peers[i] is the flat indices sharing a row, col, or box with cell i
+    self.box_of         - box_of[row][col] is the box of (row, col)
+	self.difficulty     - the number of board values that were requested to be removed
+	self.board          - a 2D list representing the values
+    self.orig_board     - a 2D list representing the original board with cells removed
+    self.sketches       - a 2D list of sketched values, 0 for none
+    self.notes          - a flat list of pencil mark bitmasks (bit n set if n is noted), 0 for none
+    self.auto_prune     - whether placing a value removes it from the notes of its peers
+    self.count          - the number of nonzero cells
+    self.orig_count     - the number of nonzero cells in the original board
+    self.selected       - (row, col) of the selected cell, or None
+    self.row_counts     - row_counts[row][num] is how many times num is in the row
+    self.col_counts     - col_counts[col][num] is how many times num is in the column
+    self.box_counts     - box_counts[box][num] is how many times num is in the box
+    self.conflicts      - the number of extra copies of digits across all rows, cols, and boxes
+    self.solution       - a 2D list of the solved board, or None if the puzzle has no single solution
+    self.wrong          - the number of placed values that differ from the solution
+    self.cand           - a flat list of candidate bitmasks (bit n set if n can go in the cell, 0 if filled)
+    self.singles        - the set of flat indices of empty cells with exactly one candidate
+    self.journal        - the list of Moves made, undone ones stay until a new move replaces them
+    self.position       - the number of Moves in the journal that are applied
+
+	Parameters:
+    difficulty is the number of board values to be removed
+    pool is an optional PuzzlePool to take the puzzle from instead of generating it
+    puzzle is an optional 2D list (or PackedBoard, e.g. from a PuzzleBank) to play instead of a new puzzle
+    row_length is the size of the board to generate (any perfect square, e.g. 9, 16, or 25),
+    boards from pool or puzzle keep their own size
+    solution is the optional solved board of puzzle (a 2D list or PackedBoard), it is solved here if not given
+
+	Return:	None
+    '''
+    def __init__(self, difficulty, pool=None, puzzle=None, row_length=ROW_LENGTH, solution=None):
+        self.difficulty = difficulty
+        # unique puzzles may keep a few more givens than asked for, so count them
+        if puzzle is not None:
+            self.board = [row[:] for row in puzzle] if isinstance(puzzle, list) else puzzle.to_grid()
+            if solution is None:
+                # only a puzzle with one solution can tell a wrong value from a different right one
+                solutions = solve(puzzle, 2)
+                if len(solutions) == 1:
+                    solution = solutions[0]
+        else:
+            if pool is not None:
+                puzzle, solution = pool.get_puzzle(difficulty)
+            else:
+                puzzle, solution = generate_puzzle(row_length, difficulty, unique=True, pattern=PATTERN)
+            self.board = puzzle.to_grid()
+        if solution is not None and not isinstance(solution, list):
+            solution = solution.to_grid()
+        self.solution = solution
+        self.row_length = len(self.board)
+        self.box_length = math.isqrt(self.row_length)
+        self.tables = get_tables(self.row_length)
+        self.units, self.peers = self.tables.units, self.tables.peers
+        self.box_of = self.tables.box_grid
+        self.full_mask = ((1 << self.row_length) - 1) << 1
+        self.orig_board = [row[:] for row in self.board]
+        self.sketches = [[0] * self.row_length for i in range(self.row_length)]
+        self.notes = [0] * (self.row_length ** 2)
+        self.auto_prune = AUTO_PRUNE_NOTES
+        self.orig_count = sum(1 for row in self.board for value in row if value != 0)
+        self.count = self.orig_count
+        self.selected = None
+        self.journal = []
+        self.position = 0
+        # cells touched by the move being made, see begin_move
+        self.move = None
+        self.move_depth = 0
+        self.count_values()
+
+    '''
+	Puts the board in a saved state (see save_game.SavedGame)
+    This is journaled as one move from the original puzzle, so reset and undo can still
+    go back to the givens
+
+	Parameters:
+    saved is a SavedGame of this board's puzzle
+	Return: None
+    '''
+    def load_state(self, saved):
+        row_of, col_of = self.tables.row_of, self.tables.col_of
+        self.begin_move("load", None, None, 0)
+        for i in range(self.row_length ** 2):
+            row, col = row_of[i], col_of[i]
+            state = (saved.values[row][col], saved.sketches[row][col], saved.notes[i])
+            if state != self.cell_state(i):
+                self.touch(i)
+                self.restore(i, state)
+        self.end_move()
+        if saved.selected is not None:
+            self.select(*saved.selected)
+
+    '''
+	Called after the value, sketch, or notes of (row, col) change
+    Does nothing here, renderers override it to redraw the cell
+
+	Parameters:
+    row and col are the cell position
+	Return: None
+    '''
+    def cell_changed(self, row, col):
+        pass
+
+    '''
+	Called after the value of (row, col) changes, which can change the conflicts
+    of any cell in its row, col, or box
+    Does nothing here, renderers override it
+
+	Parameters:
+    row and col are the cell position
+	Return: None
+    '''
+    def units_changed(self, row, col):
+        pass
+
+    '''
+	Called after the selection moves
+    Does nothing here, renderers override it
+
+	Parameters:
+    old is the previous (row, col) or None
+	Return: None
+    '''
+    def selection_changed(self, old):
+        pass
+
+    '''
+	Called after every cell may have changed at once
+    Does nothing here, renderers override it
+
+	Parameters: None
+	Return: None
+    '''
+    def board_changed(self):
+        pass
+
+    '''
+	Selects the cell at (row, col)
+
+	Parameters:
+    row is the cell row
+    col is the cell column
+	Return: None
+    '''
+    def select(self, row, col):
+        old = self.selected
+        self.selected = (row, col)
+        self.selection_changed(old)
+
+    '''
+	Clears the currently selected cell (if possible)
+
+	Parameters: None
+	Return: None
+    '''
+    def clear(self):
+        row, col = self.selected
+        if self.orig_board[row][col] == 0:
+            self.begin_move("clear", row, col, 0)
+            self.touch(row * self.row_length + col)
+            if self.board[row][col] != 0:
+                self.remove_value(row, col, self.board[row][col])
+                self.board[row][col] = 0
+                self.count -= 1
+                self.units_changed(row, col)
+            self.sketches[row][col] = 0
+            self.notes[row * self.row_length + col] = 0
+            self.cell_changed(row, col)
+            self.end_move()
+
+    '''
+	Sets the currently selected cell's sketch value
+
+	Parameters:
+    value is the number input by the keyboard to be sketched
+	Return: None
+    '''
+    def sketch(self, value):
+        row, col = self.selected
+        if self.board[row][col] == 0:
+            self.begin_move("sketch", row, col, value)
+            self.touch(row * self.row_length + col)
+            self.sketches[row][col] = value
+            self.cell_changed(row, col)
+            self.end_move()
+
+    '''
+	Adds or removes value from the currently selected cell's notes
+
+	Parameters:
+    value is the number input by the keyboard to be noted
+	Return: None
+    '''
+    def toggle_note(self, value):
+        row, col = self.selected
+        if self.board[row][col] == 0:
+            self.begin_move("note", row, col, value)
+            self.touch(row * self.row_length + col)
+            self.notes[row * self.row_length + col] ^= 1 << value
+            self.cell_changed(row, col)
+            self.end_move()
+
+    '''
+	Places the currently selected cell's sketch value as the main value and
+    clears the selected cell's sketch value
+
+	Parameters: None
+	Return: None
+    '''
+    def place_number(self):
+        row, col = self.selected
+        if self.sketches[row][col] != 0:
+            self.place_value(row, col, self.sketches[row][col])
+
+    '''
+	Places num in the empty cell (row, col), clearing its sketch and notes
+    With auto_prune num is also removed from the notes of every peer
+
+	Parameters:
+    row and col are the cell position
+    num is the value placed
+	Return: None
+    '''
+    def place_value(self, row, col, num):
+        i = row * self.row_length + col
+        self.begin_move("place", row, col, num)
+        self.touch(i)
+        self.board[row][col] = num
+        self.sketches[row][col] = 0
+        self.notes[i] = 0
+        self.add_value(row, col, num)
+        self.count += 1
+        self.cell_changed(row, col)
+        self.units_changed(row, col)
+        if self.auto_prune:
+            bit = 1 << num
+            for p in self.peers[i]:
+                if self.notes[p] & bit:
+                    self.touch(p)
+                    self.notes[p] &= ~bit
+                    self.cell_changed(self.tables.row_of[p], self.tables.col_of[p])
+        self.end_move()
+
+    '''
+	Takes the board back to the original puzzle by undoing every move
+    The moves stay in the journal, so the reset itself can be undone with redo
+
+	Parameters: None
+	Return: None
+    '''
+    def reset_to_original(self):
+        self.rewind(0)
+
+    '''
+	Starts recording a move, moves made inside it (e.g. the places of fill_singles)
+    become part of it instead of moves of their own
+
+	Parameters:
+    action is the name of the move (see Move)
+    row, col, and value are what the move was called with
+	Return: None
+    '''
+    def begin_move(self, action, row, col, value):
+        if self.move_depth == 0:
+            self.move = (action, row, col, value, {})
+        self.move_depth += 1
+
+    '''
+	Remembers the state of flat index i before the current move changes it
+
+	Parameters:
+    i is the flat cell index
+	Return: None
+    '''
+    def touch(self, i):
+        before = self.move[4]
+        if i not in before:
+            before[i] = self.cell_state(i)
+
+    '''
+	Returns what a move can change about flat index i
+
+	Parameters:
+    i is the flat cell index
+	Return: tuple(value, sketch, notes)
+    '''
+    def cell_state(self, i):
+        row, col = self.tables.row_of[i], self.tables.col_of[i]
+        return (self.board[row][col], self.sketches[row][col], self.notes[i])
+
+    '''
+	Finishes the current move and adds it to the journal, dropping the undone moves
+    Moves that changed nothing are not recorded
+
+	Parameters: None
+	Return: None
+    '''
+    def end_move(self):
+        self.move_depth -= 1
+        if self.move_depth > 0:
+            return
+        action, row, col, value, before = self.move
+        self.move = None
+        changes = []
+        for i, state in before.items():
+            after = self.cell_state(i)
+            if after != state:
+                changes.append((i, state, after))
+        if changes:
+            del self.journal[self.position:]
+            self.journal.append(Move(action, row, col, value, tuple(changes)))
+            self.position += 1
+
+    '''
+	Puts flat index i in the given state, keeping the counters and candidates up to date
+
+	Parameters:
+    i is the flat cell index
+    state is a (value, sketch, notes) tuple
+	Return: None
+    '''
+    def restore(self, i, state):
+        row, col = self.tables.row_of[i], self.tables.col_of[i]
+        value, sketch, notes = state
+        old = self.board[row][col]
+        if old != value:
+            if old != 0:
+                self.remove_value(row, col, old)
+                self.board[row][col] = 0
+                self.count -= 1
+            if value != 0:
+                self.board[row][col] = value
+                self.add_value(row, col, value)
+                self.count += 1
+            self.units_changed(row, col)
+        self.sketches[row][col] = sketch
+        self.notes[i] = notes
+        self.cell_changed(row, col)
+
+    '''
+	Undoes the last applied move
+
+	Parameters: None
+	Return: boolean (False if there was nothing to undo)
+    '''
+    def undo(self):
+        if self.position == 0:
+            return False
+        self.position -= 1
+        for i, before, after in reversed(self.journal[self.position].changes):
+            self.restore(i, before)
+        return True
+
+    '''
+	Applies the last undone move again
+
+	Parameters: None
+	Return: boolean (False if there was nothing to redo)
+    '''
+    def redo(self):
+        if self.position == len(self.journal):
+            return False
+        for i, before, after in self.journal[self.position].changes:
+            self.restore(i, after)
+        self.position += 1
+        return True
+
+    '''
+	Returns a checkpoint of the board that rewind can go back to
+    This is only the journal position, so it costs nothing to take
+
+	Parameters: None
+	Return: int
+    '''
+    def checkpoint(self):
+        return self.position
+
+    '''
+	Undoes or redoes moves until the board is back at a checkpoint
+
+	Parameters:
+    position is a value returned by checkpoint, 0 for the original puzzle
+	Return: None
+    '''
+    def rewind(self, position):
+        while self.position > position and self.undo():
+            pass
+        while self.position < position and self.redo():
+            pass
+
+    '''
+	Makes the moves of a journal again through the same methods the game calls,
+    selecting each move's cell first, e.g. to replay a recorded session from the
+    original puzzle
+    A fill places the values it recorded instead of running fill_singles again, which
+    can pick different cells when the board has wrong values, and a load puts back the
+    states it recorded
+
+	Parameters:
+    moves is a list of Moves (e.g. another board's journal[:position])
+	Return: None
+    '''
+    def replay(self, moves):
+        for move in moves:
+            if move.action == "fill":
+                self.begin_move("fill", None, None, 0)
+                for i, before, after in move.changes:
+                    if after[0] != before[0]:
+                        self.place_value(self.tables.row_of[i], self.tables.col_of[i], after[0])
+                self.end_move()
+                continue
+            if move.action == "load":
+                self.begin_move("load", None, None, 0)
+                for i, before, after in move.changes:
+                    self.touch(i)
+                    self.restore(i, after)
+                self.end_move()
+                continue
+            self.select(move.row, move.col)
+            if move.action == "sketch":
+                self.sketch(move.value)
+            elif move.action == "note":
+                self.toggle_note(move.value)
+            elif move.action == "place":
+                self.place_value(move.row, move.col, move.value)
+            elif move.action == "clear":
+                self.clear()
+
+    '''
+	Determines if the board is full (no 0s left)
+
+	Parameters: None
+	Return: boolean
+    '''
+    def is_full(self):
+        if self.count == self.row_length ** 2:
+            return True
+        return False
+
+    '''
+	Checks if the board is full and all values are correct
+    Compares against the tracked count of wrong values when the solution is known, otherwise
+    a full board with no digit repeated in any row, col, or box is solved
+
+	Parameters: None
+	Return: boolean
+    '''
+    def check_board(self):
+        if self.solution is not None:
+            return self.is_full() and self.wrong == 0
+        return self.is_full() and self.conflicts == 0
+
+    '''
+	Rebuilds the row, col, and box digit counters and the candidates from the board
+
+	Parameters: None
+	Return: None
+    '''
+    def count_values(self):
+        n = self.row_length
+        self.row_counts = [[0] * (n + 1) for i in range(n)]
+        self.col_counts = [[0] * (n + 1) for i in range(n)]
+        self.box_counts = [[0] * (n + 1) for i in range(n)]
+        self.conflicts = 0
+        self.wrong = 0
+        # every cell starts with all candidates, add_value removes them as the values are counted
+        self.cand = [self.full_mask] * (n * n)
+        self.singles = set()
+        for i in range(n):
+            for j in range(n):
+                if self.board[i][j] != 0:
+                    self.add_value(i, j, self.board[i][j])
+
+    '''
+	Counts num as present in the row, col, and box of (row, col)
+
+	Parameters:
+    row and col are the cell position
+    num is the value placed
+	Return: None
+    '''
+    def add_value(self, row, col, num):
+        if self.solution is not None and self.solution[row][col] != num:
+            self.wrong += 1
+        box = self.box_of[row][col]
+        for counts in (self.row_counts[row], self.col_counts[col], self.box_counts[box]):
+            # every copy past the first is a conflict
+            if counts[num] > 0:
+                self.conflicts += 1
+            counts[num] += 1
+        i = row * self.row_length + col
+        self.set_candidates(i, 0)
+        bit = 1 << num
+        for p in self.peers[i]:
+            if self.cand[p] & bit:
+                self.set_candidates(p, self.cand[p] & ~bit)
+
+    '''
+	Counts num as no longer present in the row, col, and box of (row, col)
+
+	Parameters:
+    row and col are the cell position
+    num is the value removed
+	Return: None
+    '''
+    def remove_value(self, row, col, num):
+        if self.solution is not None and self.solution[row][col] != num:
+            self.wrong -= 1
+        box = self.box_of[row][col]
+        for counts in (self.row_counts[row], self.col_counts[col], self.box_counts[box]):
+            counts[num] -= 1
+            if counts[num] > 0:
+                self.conflicts -= 1
+        # num comes back to the empty peers that no longer see it anywhere, and the cell
+        # itself gets every digit its row, col, and box don't have
+        i = row * self.row_length + col
+        self.set_candidates(i, self.free_digits(row, col))
+        bit = 1 << num
+        row_of, col_of = self.tables.row_of, self.tables.col_of
+        for p in self.peers[i]:
+            r, c = row_of[p], col_of[p]
+            if self.board[r][c] == 0 and not self.cand[p] & bit and self.row_counts[r][num] == 0 \
+                    and self.col_counts[c][num] == 0 and self.box_counts[self.box_of[r][c]][num] == 0:
+                self.set_candidates(p, self.cand[p] | bit)
+
+    '''
+	Returns the digits that are not in the row, col, or box of (row, col)
+
+	Parameters:
+    row and col are the cell position
+	Return: int (bitmask, bit n set if n is free)
+    '''
+    def free_digits(self, row, col):
+        box = self.box_counts[self.box_of[row][col]]
+        row_counts = self.row_counts[row]
+        col_counts = self.col_counts[col]
+        mask = 0
+        for num in range(1, self.row_length + 1):
+            if row_counts[num] == 0 and col_counts[num] == 0 and box[num] == 0:
+                mask |= 1 << num
+        return mask
+
+    '''
+	Sets the candidates of flat index i, keeping track of the cells with a single candidate
+
+	Parameters:
+    i is the flat cell index
+    mask is the candidate bitmask
+	Return: None
+    '''
+    def set_candidates(self, i, mask):
+        self.cand[i] = mask
+        if mask and mask & (mask - 1) == 0:
+            self.singles.add(i)
+        else:
+            self.singles.discard(i)
+
+    '''
+	Determines if the value at (row, col) is repeated in its row, col, or box
+
+	Parameters:
+    row and col are the cell position
+	Return: boolean
+    '''
+    def is_conflict(self, row, col):
+        num = self.board[row][col]
+        if num == 0 or self.conflicts == 0:
+            return False
+        box = self.box_of[row][col]
+        return self.row_counts[row][num] > 1 or self.col_counts[col][num] > 1 or self.box_counts[box][num] > 1
+
+    '''
+	Determines if the value at (row, col) differs from the solution
+    Always False when the solution is not known
+
+	Parameters:
+    row and col are the cell position
+	Return: boolean
+    '''
+    def is_wrong(self, row, col):
+        num = self.board[row][col]
+        if num == 0 or self.wrong == 0:
+            return False
+        return self.solution[row][col] != num
+
+    '''
+	Finds every cell whose value is repeated in its row, col, or box
+
+	Parameters: None
+	Return: list[tuple(row, col)]
+    '''
+    def get_conflicts(self):
+        if self.conflicts == 0:
+            return []
+        return [(i, j) for i in range(self.row_length) for j in range(self.row_length) if self.is_conflict(i, j)]
+
+    '''
+	Returns the digits that can still go in (row, col)
+
+	Parameters:
+    row and col are the cell position
+	Return: list[int] (empty for filled cells)
+    '''
+    def get_candidates(self, row, col):
+        mask = self.cand[row * self.row_length + col]
+        return [num for num in range(1, self.row_length + 1) if mask & (1 << num)]
+
+    '''
+	Finds the next logical move
+    Wrong values are pointed out first, then naked singles come straight from the tracked
+    candidates and hidden singles from one pass over the units. Only when neither exists
+    is the grader run on the board, starting from the tracked candidates, to find the
+    easiest technique that places a value
+
+	Parameters: None
+	Return: Hint or None (None if the board is full or has no single solution to guess from)
+    '''
+    def hint(self):
+        n = self.row_length
+        if self.wrong:
+            for i in range(n):
+                for j in range(n):
+                    if self.is_wrong(i, j):
+                        return Hint(i, j, self.solution[i][j], "mistake")
+        if self.singles:
+            i = next(iter(self.singles))
+            return Hint(self.tables.row_of[i], self.tables.col_of[i], self.cand[i].bit_length() - 1, "naked single")
+        for unit in self.units:
+            once = 0
+            twice = 0
+            for i in unit:
+                twice |= once & self.cand[i]
+                once |= self.cand[i]
+            hidden = once & ~twice
+            if hidden:
+                bit = hidden & -hidden
+                for i in unit:
+                    if self.cand[i] & bit:
+                        return Hint(self.tables.row_of[i], self.tables.col_of[i], bit.bit_length() - 1, "hidden single")
+        if self.is_full():
+            return None
+        grader = Grader(self.board, self.cand)
+        placed = grader.next_placement()
+        if placed is not None:
+            i, num = placed
+            return Hint(self.tables.row_of[i], self.tables.col_of[i], num, grader.hardest[0])
+        if self.solution is None:
+            return None
+        # no technique helps, so the cell with the fewest candidates is the best one to guess
+        i = min((i for i in range(n * n) if self.cand[i]), key=lambda i: self.cand[i].bit_count(), default=None)
+        if i is None:
+            return None
+        row, col = self.tables.row_of[i], self.tables.col_of[i]
+        return Hint(row, col, self.solution[row][col], "guess")
+
+    '''
+	Places every naked single, and the singles that placing them creates, until none are left
+    This is journaled as one move
+
+	Parameters: None
+	Return: int (the number of values placed)
+    '''
+    def fill_singles(self):
+        filled = 0
+        self.begin_move("fill", None, None, 0)
+        while self.singles:
+            i = self.singles.pop()
+            self.place_value(self.tables.row_of[i], self.tables.col_of[i], self.cand[i].bit_length() - 1)
+            filled += 1
+        self.end_move()
+        return filled
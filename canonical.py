@@ -0,0 +1,267 @@
+import math
+from itertools import permutations
+from solver import parse_board
+
+"""
+Canonical form of a puzzle under the sudoku symmetry group
+Two puzzles are equivalent if one can be turned into the other by any mix of transposing,
+swapping bands (groups of box_length rows) or stacks (groups of box_length cols),
+swapping rows within a band or cols within a stack, and relabeling the digits.
+The canonical form is the smallest string over the whole group, where digits are
+relabeled 1, 2, 3... in order of first appearance and empty cells stay 0.
+
+Instead of trying all 3.3 billion transforms, the form is built one cell at a time.
+Only the transforms that give the smallest prefix so far are kept, so almost every
+branch is dropped after its first row or two.
+The column orders alone number (box_length!)**(box_length+1), so this is only practical
+up to 9x9 (about 8 million orders for 16x16).
+
+"""
+
+# row_length -> (column orders that keep stacks together, their inverses)
+column_orders = {}
+
+'''
+Returns every column order that keeps the cols of each stack together, with its inverse
+These are computed once per size and shared by every call
+
+Parameters:
+n is the number of rows/columns of the board
+
+Return: tuple(list[tuple], list[list]) (orders, where inverses[k][col] is the position of col in orders[k])
+'''
+def stack_orders(n):
+    if n not in column_orders:
+        box = math.isqrt(n)
+        orders = []
+        for stacks in permutations(range(box)):
+            partial = [()]
+            for stack in stacks:
+                cols = range(stack * box, stack * box + box)
+                partial = [order + inner for order in partial for inner in permutations(cols)]
+            orders.extend(partial)
+        inverses = []
+        for order in orders:
+            inverse = [0] * n
+            for position, col in enumerate(order):
+                inverse[col] = position
+            inverses.append(inverse)
+        column_orders[n] = (orders, inverses)
+    return column_orders[n]
+
+'''
+Canonical form of a completely filled grid
+Every first row is then a permutation of all the digits, so every column order ties on it
+and labels each digit by its position. Labels come straight from the precomputed inverse
+column orders instead of being built per state
+
+Parameters:
+grid and transposed are the rows of the grid and of its transpose as tuples
+n is the number of rows/columns of the board
+
+Return: bytes
+'''
+def canonical_full(grid, transposed, n):
+    box = math.isqrt(n)
+    orders, inverses = stack_orders(n)
+    result = list(range(1, n + 1))
+    # each state is (rows, chosen rows, column order index, col_of) where col_of[num] is the
+    # col of num in the first row, so the label of num is inverses[k][col_of[num]] + 1
+    # the second row is done here without building a state for every first row and column order
+    smallest = n + 1
+    states = []
+    for rows in (grid, transposed):
+        for r in range(n):
+            col_of = [0] * (n + 1)
+            for col, num in enumerate(rows[r]):
+                col_of[num] = col
+            band = r // box
+            for second in range(band * box, band * box + box):
+                if second == r:
+                    continue
+                row = rows[second]
+                for k in range(len(orders)):
+                    label = inverses[k][col_of[row[orders[k][0]]]] + 1
+                    if label < smallest:
+                        smallest = label
+                        states = [(rows, (r, second), k, col_of)]
+                    elif label == smallest:
+                        states.append((rows, (r, second), k, col_of))
+    result.append(smallest)
+
+    for position in range(1, n):
+        if position > 1:
+            # expands each state with its allowed next rows, keeping only those with the smallest first cell
+            smallest = n + 1
+            options = []
+            for rows, chosen, k, col_of in states:
+                first_col = orders[k][0]
+                inverse = inverses[k]
+                for r in next_rows(chosen, box, n):
+                    label = inverse[col_of[rows[r][first_col]]] + 1
+                    if label < smallest:
+                        smallest = label
+                        options = [(rows, chosen + (r,), k, col_of)]
+                    elif label == smallest:
+                        options.append((rows, chosen + (r,), k, col_of))
+            result.append(smallest)
+            states = options
+
+        for j in range(1, n):
+            smallest = n + 1
+            options = []
+            for state in states:
+                rows, chosen, k, col_of = state
+                label = inverses[k][col_of[rows[chosen[-1]][orders[k][j]]]] + 1
+                if label < smallest:
+                    smallest = label
+                    options = [state]
+                elif label == smallest:
+                    options.append(state)
+            result.append(smallest)
+            states = options
+    return bytes(result)
+
+'''
+Returns the rows that may come next after the chosen ones, keeping bands together
+
+Parameters:
+chosen is the tuple of rows already placed
+box_length is the number of rows in a band
+n is the number of rows/columns of the board
+
+Return: list[int]
+'''
+def next_rows(chosen, box_length, n):
+    if len(chosen) % box_length == 0:
+        # a new band starts, any row of an unused band can come next
+        used = {r // box_length for r in chosen}
+        return [r for r in range(n) if r // box_length not in used]
+    band = chosen[-1] // box_length
+    return [r for r in range(band * box_length, band * box_length + box_length) if r not in chosen]
+
+'''
+Returns the cols that may come next after the ones already ordered, keeping stacks together
+
+Parameters:
+order is the tuple of cols already placed
+box_length is the number of cols in a stack
+n is the number of rows/columns of the board
+
+Return: list[int]
+'''
+def next_cols(order, box_length, n):
+    if len(order) % box_length == 0:
+        # a new stack starts, any col of an unused stack can come next
+        used = {col // box_length for col in order}
+        return [col for col in range(n) if col // box_length not in used]
+    stack = order[-1] // box_length
+    return [col for col in range(stack * box_length, stack * box_length + box_length) if col not in order]
+
+'''
+Returns the canonical form of a puzzle or solved grid
+
+Parameters:
+board is a 2D list of ints, a PackedBoard, or a string (see solver.parse_board)
+
+Return: bytes (row_length**2 bytes, one value per cell)
+'''
+def canonical_form(board):
+    cells = parse_board(board)
+    n = math.isqrt(len(cells))
+    box = math.isqrt(n)
+    grid = [tuple(cells[r * n:(r + 1) * n]) for r in range(n)]
+    transposed = [tuple(cells[c::n]) for c in range(n)]
+    if all(len(set(line)) == n for line in grid + transposed) and 0 not in cells:
+        return canonical_full(grid, transposed, n)
+
+    # first row: starts from every row of the grid and of its transpose, and picks the
+    # column order one col at a time, so lines with a worse prefix are dropped early
+    states = [(rows, (r,), (), {0: 0}) for rows in (grid, transposed) for r in range(n)]
+    result = []
+    for position in range(n):
+        smallest = n + 1
+        options = []
+        for rows, chosen, order, labels in states:
+            row = rows[chosen[0]]
+            for col in next_cols(order, box, n):
+                label = labels.get(row[col], len(labels))
+                if label < smallest:
+                    smallest = label
+                    options = []
+                if label == smallest:
+                    options.append((rows, chosen, order, labels, col))
+        result.append(smallest)
+        states = []
+        for rows, chosen, order, labels, col in options:
+            num = rows[chosen[0]][col]
+            if num not in labels:
+                labels = dict(labels)
+                labels[num] = len(labels)
+            states.append((rows, chosen, order + (col,), labels))
+
+    # remaining rows: try every allowed next row for every state, then compare the
+    # states one cell at a time so most of them are dropped after a cell or two
+    for position in range(1, n):
+        expanded = []
+        for rows, chosen, order, labels in states:
+            for r in next_rows(chosen, box, n):
+                expanded.append((rows, chosen + (r,), order, labels))
+        states = expanded
+
+        for j in range(n):
+            smallest = n + 1
+            options = []
+            for state in states:
+                rows, chosen, order, labels = state
+                num = rows[chosen[-1]][order[j]]
+                label = labels.get(num, len(labels))
+                if label < smallest:
+                    smallest = label
+                    options = []
+                if label == smallest:
+                    if num not in labels:
+                        labels = dict(labels)
+                        labels[num] = label
+                        state = (rows, chosen, order, labels)
+                    options.append(state)
+            result.append(smallest)
+            states = options
+    return bytes(result)
+
+class CanonicalIndex():
+    '''
+	A set of canonical forms used to reject puzzles equivalent to ones already seen
+    This should initialize:
+    self.forms          - the set of canonical forms added so far
+    self.duplicates     - the number of puzzles rejected by add
+
+	Parameters: None
+	Return: None
+    '''
+    def __init__(self):
+        self.forms = set()
+        self.duplicates = 0
+
+    '''
+	Adds a puzzle unless an equivalent one is already in the index
+
+	Parameters:
+    board is a 2D list of ints, a PackedBoard, or a string (see solver.parse_board)
+    form is the canonical form of board if it was already computed
+	Return: boolean (True if the puzzle was new)
+    '''
+    def add(self, board, form=None):
+        if form is None:
+            form = canonical_form(board)
+        if form in self.forms:
+            self.duplicates += 1
+            return False
+        self.forms.add(form)
+        return True
+
+    def __contains__(self, board):
+        return canonical_form(board) in self.forms
+
+    def __len__(self):
+        return len(self.forms)
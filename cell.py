@@ -1,13 +1,35 @@
 import pygame
 from constants import *
+from lookup_tables import cell_rects
 
-pygame.font.init()
-value_font = pygame.font.Font(None, 48)
-sketch_font = pygame.font.Font(None, 36)
-# rendered images of numbers 1-9
-rendered_values = [value_font.render(str(i), True, BLACK) for i in range(1, 10)]
-rendered_values_user = [value_font.render(str(i), True, BLUE) for i in range(1, 10)]
-rendered_sketches = [sketch_font.render(str(i), True, LIGHT_BLUE) for i in range(1, 10)]
+# rendered images of the cell symbols for each board size (row_length -> list), created by
+# load_glyphs on the first draw so importing this module doesn't start the pygame font system
+rendered_values = {}
+rendered_values_user = {}
+rendered_values_conflict = {}
+rendered_sketches = {}
+rendered_notes = {}
+
+'''
+Initializes the pygame fonts and renders the symbol images used by Cell.draw for one board size
+Values past 9 are shown as letters (see SYMBOLS)
+
+Parameters:
+row_length is the number of rows/columns of the board
+Return: None
+'''
+def load_glyphs(row_length):
+    pygame.font.init()
+    # the font sizes fit 9x9 cells and shrink with the cells on bigger boards
+    value_font = pygame.font.Font(None, 48 * 9 // row_length)
+    sketch_font = pygame.font.Font(None, 36 * 9 // row_length)
+    note_font = pygame.font.Font(None, 24 * 9 // row_length)
+    symbols = SYMBOLS[:row_length]
+    rendered_values[row_length] = [value_font.render(symbol, True, BLACK) for symbol in symbols]
+    rendered_values_user[row_length] = [value_font.render(symbol, True, BLUE) for symbol in symbols]
+    rendered_values_conflict[row_length] = [value_font.render(symbol, True, RED) for symbol in symbols]
+    rendered_sketches[row_length] = [sketch_font.render(symbol, True, LIGHT_BLUE) for symbol in symbols]
+    rendered_notes[row_length] = [note_font.render(symbol, True, GRAY) for symbol in symbols]
 
 class Cell():
     '''
@@ -15,25 +37,50 @@ class Cell():
     Should initialize:
     self.value          - confirmed cell value
     self.sketch_value   - value for the user to stage before locking in
+    self.notes          - bitmask of the pencil marks (bit n set if n is noted)
     self.row            - row on the board
     self.col            - col on the board
     self.screen         - pygame surface for rendering
+    self.row_length     - the number of rows/columns of the board the cell is in
     self.rect           - pygame rect 
+    self.center         - (x, y) center of the rect
+    self.note_centers   - (x, y) centers of the notes 1 to row_length
+    self.dirty_rects    - list the cell's rect is added to whenever it changes
 
 	Parameters:
     value is the cell's number
     row is the row on the board
     col is the col on the board
     screen is the pygame surface
+    dirty_rects is an optional list shared with the board to report changes to
+    row_length is the number of rows/columns of the board
 	Return: None
     '''
-    def __init__(self, value, row, col, screen):
+    def __init__(self, value, row, col, screen, dirty_rects=None, row_length=ROW_LENGTH):
         self.value = value
         self.sketch_value = 0
+        self.notes = 0
         self.row = row
         self.col = col
         self.screen = screen
-        self.rect = pygame.Rect((SCREEN_RES[0]-GAME_BORDER[0])/ROW_LENGTH*col, (SCREEN_RES[1]-GAME_BORDER[1])/ROW_LENGTH*row, (SCREEN_RES[0]-GAME_BORDER[0])/ROW_LENGTH, (SCREEN_RES[1]-GAME_BORDER[1])/ROW_LENGTH)
+        self.row_length = row_length
+        self.resize(SCREEN_RES[0]-GAME_BORDER[0], SCREEN_RES[1]-GAME_BORDER[1])
+        self.dirty_rects = dirty_rects if dirty_rects is not None else []
+
+    '''
+    Moves the cell to its place on a board of a new size
+
+    Parameters:
+    width is the board width in pixels
+    height is the board height in pixels
+    Return: None
+    '''
+    def resize(self, width, height):
+        rects, centers, note_centers = cell_rects(self.row_length, width, height)
+        i = self.row * self.row_length + self.col
+        self.rect = pygame.Rect(rects[i])
+        self.center = centers[i]
+        self.note_centers = note_centers[i]
 
     '''
     Changes the cells value
@@ -44,6 +91,7 @@ class Cell():
     '''
     def set_cell_value(self, value):
         self.value = value
+        self.dirty_rects.append(self.rect)
 
     '''
     Changes the sketch value
@@ -54,20 +102,47 @@ class Cell():
     '''
     def set_sketched_value(self, value):
         self.sketch_value = value
+        self.dirty_rects.append(self.rect)
+
+    '''
+    Changes the pencil marks
+
+    Parameters:
+    notes is the new bitmask of noted values
+    Return: None
+    '''
+    def set_notes(self, notes):
+        if notes != self.notes:
+            self.notes = notes
+            self.dirty_rects.append(self.rect)
 
     '''
     Generates the game layout with labels, buttons, and scenes
 
     Parameters:
     user is a boolean representing whether the cell is user entered or a static board cell
+    conflict is a boolean representing whether the value is repeated in its row, col, or box
+    surface is an optional pygame surface to draw on instead of the screen
     Return: None
     '''
-    def draw(self, user=False):
+    def draw(self, user=False, conflict=False, surface=None):
+        if surface is None:
+            surface = self.screen
+        if self.row_length not in rendered_values:
+            load_glyphs(self.row_length)
         if self.sketch_value != 0:
-            self.screen.blit(rendered_sketches[self.sketch_value-1], self.rect.move(SKETCH_OFFSET, SKETCH_OFFSET))
+            surface.blit(rendered_sketches[self.row_length][self.sketch_value-1], self.rect.move(SKETCH_OFFSET, SKETCH_OFFSET))
+        elif self.notes and self.value == 0:
+            # notes sit in a box_length x box_length mini grid, value n in the same spot as in a box
+            glyphs = rendered_notes[self.row_length]
+            for num in range(1, self.row_length + 1):
+                if self.notes & (1 << num):
+                    surface.blit(glyphs[num-1], glyphs[num-1].get_rect(center=self.note_centers[num-1]))
         if self.value != 0:
-            cell_center_offset = (SCREEN_RES[0]-GAME_BORDER[0])/ROW_LENGTH*self.col+(SCREEN_RES[0]-GAME_BORDER[0])/(ROW_LENGTH*2), (SCREEN_RES[1]-GAME_BORDER[1])/ROW_LENGTH*self.row+(SCREEN_RES[1]-GAME_BORDER[1])/(ROW_LENGTH*2)
-            if user:
-                self.screen.blit(rendered_values_user[self.value-1], rendered_values_user[self.value-1].get_rect(center=(cell_center_offset)))
+            if conflict:
+                glyph = rendered_values_conflict[self.row_length][self.value-1]
+            elif user:
+                glyph = rendered_values_user[self.row_length][self.value-1]
             else:
-                self.screen.blit(rendered_values[self.value-1], rendered_values[self.value-1].get_rect(center=(cell_center_offset)))
+                glyph = rendered_values[self.row_length][self.value-1]
+            surface.blit(glyph, glyph.get_rect(center=self.center))
@@ -1,27 +1,47 @@
-import pygame
 from math import sqrt
 
+# no pygame here, so game logic and batch tools can import constants without it
+
 # screen size
 SCREEN_RES = (720, 770)
 GAME_BORDER = (0, 50)
 
-# pygame
-NUMBERS = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9]
-
 # rendering
 BTN_PADDING = 10
 BTN_BORDER = 2
 SKETCH_OFFSET = 4
 SELECT_LINE_WIDTH = 3
+# frame rate cap while something is changing
+FPS = 60
 
 # board
 ROW_LENGTH = 9
 BOX_LENGTH = int(sqrt(ROW_LENGTH))
+# board sizes offered in the menu
+SIZES = [9, 16, 25]
+# how values are shown, values past 9 use letters (e.g. 16 is G)
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
 
 # game
 EASY = 30
 MEDIUM = 40
 HARD = 50
+# difficulty names used on the command line and in puzzle files -> cells removed on a 9x9 board
+DIFFICULTIES = {"easy": EASY, "medium": MEDIUM, "hard": HARD}
+# number of ready puzzles kept per difficulty
+POOL_SIZE = 3
+# shape of the removed cells in the game's puzzles (see sudoku_generator.PATTERNS)
+PATTERN = "rotational"
+# show placed values that differ from the solution in red right away, not only conflicts
+SHOW_MISTAKES = True
+# remove a placed value from the notes of every cell in its row, col, and box
+AUTO_PRUNE_NOTES = True
+
+# save file of the game in progress, and how often it is autosaved while playing
+SAVE_FILE = "sudoku.save"
+AUTOSAVE_SECONDS = 5
+# puzzle bank (see puzzle_bank.py) used instead of generating when it has puzzles of the picked size
+BANK_FILE = "puzzles.bank"
 
 # colors
 BLACK = (0, 0, 0)
@@ -0,0 +1,136 @@
+import math
+from lookup_tables import get_tables
+
+class Constraints():
+    '''
+	Tracks which digits are used in every row, column, and box of a board
+    Each unit is stored as an int bitmask where bit n is set if digit n is used,
+    so checking a digit or listing the candidates of a cell never rescans the board
+    This should initialize:
+    self.row_length     - the length of each row
+    self.box_length     - the square root of row_length
+    self.full_mask      - bitmask with a bit set for every digit 1 to row_length
+    self.rows           - a list of bitmasks, one per row
+    self.cols           - a list of bitmasks, one per column
+    self.boxes          - a list of bitmasks, one per box
+    self.box_of         - a 2D list holding the box index of every cell
+
+	Parameters:
+    row_length is the number of rows/columns of the board
+    board is an optional 2D list of ints used to fill the masks
+
+	Return: None
+    '''
+    def __init__(self, row_length, board=None):
+        self.row_length = row_length
+        self.box_length = int(math.sqrt(row_length))
+        # bits 1 to row_length, bit 0 is never used since 0 means empty
+        self.full_mask = ((1 << row_length) - 1) << 1
+        self.rows = [0] * row_length
+        self.cols = [0] * row_length
+        self.boxes = [0] * row_length
+        self.box_of = get_tables(row_length).box_grid
+        if board is not None:
+            for i in range(row_length):
+                for j in range(row_length):
+                    if board[i][j] != 0:
+                        self.place(i, j, board[i][j])
+
+    '''
+	Marks num as used in the row, column, and box of (row, col)
+
+	Parameters:
+    row and col are the row index and col index of the cell
+    num is the value being placed
+
+	Return: None
+    '''
+    def place(self, row, col, num):
+        bit = 1 << num
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[self.box_of[row][col]] |= bit
+
+    '''
+	Marks num as unused in the row, column, and box of (row, col)
+    Should only be called to undo a previous place
+
+	Parameters:
+    row and col are the row index and col index of the cell
+    num is the value being removed
+
+	Return: None
+    '''
+    def remove(self, row, col, num):
+        bit = ~(1 << num)
+        self.rows[row] &= bit
+        self.cols[col] &= bit
+        self.boxes[self.box_of[row][col]] &= bit
+
+    '''
+	Returns a bitmask of the digits that are used by any peer of (row, col)
+
+	Parameters:
+    row and col are the row index and col index of the cell
+
+	Return: int
+    '''
+    def used(self, row, col):
+        return self.rows[row] | self.cols[col] | self.boxes[self.box_of[row][col]]
+
+    '''
+	Determines if num can be placed at (row, col) without breaking a constraint
+
+	Parameters:
+    row and col are the row index and col index of the cell
+    num is the value to test
+
+	Return: boolean
+    '''
+    def is_valid(self, row, col, num):
+        return not (self.rows[row] | self.cols[col] | self.boxes[self.box_of[row][col]]) >> num & 1
+
+    '''
+	Returns a bitmask of the digits that can still be placed at (row, col)
+
+	Parameters:
+    row and col are the row index and col index of the cell
+
+	Return: int
+    '''
+    def candidates(self, row, col):
+        return ~(self.rows[row] | self.cols[col] | self.boxes[self.box_of[row][col]]) & self.full_mask
+
+    '''
+	Returns an independent copy of the masks
+
+	Parameters: None
+	Return: Constraints
+    '''
+    def copy(self):
+        other = Constraints.__new__(Constraints)
+        other.row_length = self.row_length
+        other.box_length = self.box_length
+        other.full_mask = self.full_mask
+        other.rows = self.rows[:]
+        other.cols = self.cols[:]
+        other.boxes = self.boxes[:]
+        # box_of is a shared lookup table that never changes
+        other.box_of = self.box_of
+        return other
+
+'''
+Converts a candidate bitmask into a list of digits in ascending order
+
+Parameters:
+mask is a bitmask where bit n is set if digit n is a candidate
+
+Return: list[int]
+'''
+def mask_to_digits(mask):
+    digits = []
+    while mask:
+        low = mask & -mask
+        digits.append(low.bit_length() - 1)
+        mask ^= low
+    return digits
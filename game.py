@@ -1,5 +1,28 @@
 from constants import *
+import os, time
 import pygame, board
+from puzzle_pool import PuzzlePool
+from canonical import CanonicalIndex
+from save_game import Autosaver, pack_game, load_game, DELETE
+from puzzle_bank import PuzzleBank
+from sudoku_generator import scale_difficulty
+
+# number keys -> values 1-9
+NUMBERS = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9]
+# values 10-25 on bigger boards, typed as the letters they are shown as
+LETTERS = [pygame.K_a, pygame.K_b, pygame.K_c, pygame.K_d, pygame.K_e, pygame.K_f, pygame.K_g, pygame.K_h,
+           pygame.K_i, pygame.K_j, pygame.K_k, pygame.K_l, pygame.K_m, pygame.K_n, pygame.K_o, pygame.K_p]
+# key -> the value it types
+KEY_VALUES = {key: NUMBERS.index(key) + 1 for key in NUMBERS}
+KEY_VALUES.update({key: LETTERS.index(key) + 10 for key in LETTERS})
+# events after which the window contents may be gone (uncovered, shown, or restored), the
+# loop sleeps while nothing is dirty so these have to wake it for a full redraw
+REDRAW_EVENTS = [pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN, pygame.WINDOWRESTORED,
+                 pygame.WINDOWMAXIMIZED, pygame.WINDOWSIZECHANGED]
+# the only events the game handles, SDL drops every other event before it reaches Python
+ALLOWED_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN] + REDRAW_EVENTS
+# size in pixels of the squares buttons are bucketed in for hit-testing
+HIT_CELL = 64
 
 class Label():
     '''
@@ -8,6 +31,7 @@ class Label():
     self.font           - the pygame font to be used
     self.rendered_text  - the image of the text using the font
     self.text_rect      - the pygame rect using size and location
+    self.dirty_rects    - screen rects that changed since the last render
 
 	Parameters:
     text is the text contained in the label
@@ -20,8 +44,32 @@ class Label():
     def __init__(self, text, location, font_size=48, color=BLACK):
         pygame.font.init()
         self.font = pygame.font.Font(None, font_size)
+        self.color = color
         self.rendered_text = self.font.render(text, True, color)
         self.text_rect = self.rendered_text.get_rect(center=location)
+        self.dirty_rects = []
+
+    '''
+	Returns the screen area the label covers
+
+	Parameters: None
+	Return: pygame.Rect
+    '''
+    def get_rect(self):
+        return self.text_rect
+
+    '''
+	Changes the label text and marks the old and new areas as changed
+
+	Parameters:
+    text is the new text
+	Return: None
+    '''
+    def set_text(self, text):
+        self.dirty_rects.append(self.get_rect())
+        self.rendered_text = self.font.render(text, True, self.color)
+        self.text_rect = self.rendered_text.get_rect(center=self.text_rect.center)
+        self.dirty_rects.append(self.get_rect())
 
     '''
 	Draws the text to the screen
@@ -45,14 +93,16 @@ class Button(Label):
     self.border_color       - border outline color
     self.text               - text within the button
     self.value              - value of the button (mainly used for difficulty)
+    self.action             - function called with the button when it is clicked, or None
 
 	Parameters:
     text, location, font_size, and text_color are used to generate the label
     background_color is the color of the button
     border_color is the color of the outline
+    action is the function called with the button when it is clicked
 	Return: None
     '''
-    def __init__(self, text, location, value=0, font_size=36, text_color=BLACK, background_color=WHITE, border_color=BLACK):
+    def __init__(self, text, location, value=0, font_size=36, text_color=BLACK, background_color=WHITE, border_color=BLACK, action=None):
         super().__init__(text, location, font_size, text_color)
         self.background_rect = self.text_rect.inflate(BTN_PADDING, BTN_PADDING)
         self.border_rect = self.background_rect.inflate(BTN_BORDER, BTN_BORDER)
@@ -60,6 +110,31 @@ class Button(Label):
         self.border_color = border_color
         self.text = text
         self.value = value
+        self.action = action
+
+    '''
+	Returns the screen area the button covers
+
+	Parameters: None
+	Return: pygame.Rect
+    '''
+    def get_rect(self):
+        return self.border_rect
+
+    '''
+	Changes the button text, resizing the background and border around it
+
+	Parameters:
+    text is the new text
+	Return: None
+    '''
+    def set_text(self, text):
+        self.dirty_rects.append(self.get_rect())
+        super().set_text(text)
+        self.background_rect = self.text_rect.inflate(BTN_PADDING, BTN_PADDING)
+        self.border_rect = self.background_rect.inflate(BTN_BORDER, BTN_BORDER)
+        self.text = text
+        self.dirty_rects.append(self.get_rect())
 
     '''
 	Draws the button border, background, and text to the screen
@@ -76,6 +151,8 @@ class Button(Label):
 class Scene():
     '''
 	Creates a scene which hold and uses buttons and labels
+    Should initialize:
+    self.hit_grid       - (x // HIT_CELL, y // HIT_CELL) -> the buttons touching that square
 
 	Parameters:
     tag is the name of the scene
@@ -87,17 +164,62 @@ class Scene():
         self.tag = tag
         self.btns = btns
         self.lbls = lbls
+        self.index_buttons()
+
+    '''
+	Buckets the buttons by the squares they touch, must be called again after
+    buttons are added, removed, or resized
+
+	Parameters: None
+	Return: None
+    '''
+    def index_buttons(self):
+        self.hit_grid = {}
+        for btn in self.btns:
+            rect = btn.get_rect()
+            for x in range(rect.left // HIT_CELL, (rect.right - 1) // HIT_CELL + 1):
+                for y in range(rect.top // HIT_CELL, (rect.bottom - 1) // HIT_CELL + 1):
+                    self.hit_grid.setdefault((x, y), []).append(btn)
+
+    '''
+	Finds the button at a screen position, only testing the buttons in its square
+
+	Parameters:
+    pos is the (x, y) screen position
+	Return: Button or None
+    '''
+    def button_at(self, pos):
+        for btn in self.hit_grid.get((pos[0] // HIT_CELL, pos[1] // HIT_CELL), ()):
+            if btn.get_rect().collidepoint(pos):
+                return btn
+        return None
 
     '''
 	Draws the buttons and labels to the screen
+    When area is given only the objects touching it are drawn
 
 	Parameters:
     screen is the pygame surface the text should be rendered on
+    area is an optional pygame rect to redraw
 	Return: None
     '''
-    def render(self, screen):
+    def render(self, screen, area=None):
         for obj in self.btns + self.lbls:
-            obj.render(screen)
+            if area is None or area.colliderect(obj.get_rect()):
+                obj.render(screen)
+
+    '''
+	Returns the screen rects of the buttons and labels that changed since the last call
+
+	Parameters: None
+	Return: list[pygame.Rect]
+    '''
+    def pop_dirty_rects(self):
+        rects = []
+        for obj in self.btns + self.lbls:
+            rects.extend(obj.dirty_rects)
+            obj.dirty_rects = []
+        return rects
 
 
 class Game():
@@ -110,6 +232,17 @@ class Game():
     self.board          - a board object
     self.scene_list     - a list holding all scenes
     self.current_scnee  - the current scene with all buttons and labels that should be shown
+    self.row_length     - the board size picked in the menu
+    self.pools          - board size -> pool of pre-generated puzzles for each difficulty
+    self.full_redraw    - whether the whole screen must be redrawn on the next render
+    self.elapsed        - the number of seconds the current board has been played
+    self.autosaver      - writes the game in progress to SAVE_FILE in the background
+    self.last_save      - time.monotonic() of the last autosave
+    self.bank           - the PuzzleBank in BANK_FILE, or None if there is none
+    self.btn_resume     - the RESUME button, in the menu only while there is a save (see show_resume)
+    self.event_handlers - event type -> handler called with the event
+    self.keymap         - key -> handler called when a cell is selected
+    self.ctrl_keymap    - key -> handler called when the key is pressed with ctrl
 
 	Parameters:
     scenes is a list of scenes the game will use
@@ -124,6 +257,58 @@ class Game():
         self.board = None
         self.scene_list = scenes
         self.current_scene = scenes[0]
+        self.row_length = ROW_LENGTH
+        self.pools = {}
+        self.get_pool(ROW_LENGTH)
+        self.full_redraw = True
+        self.elapsed = 0.0
+        self.autosaver = Autosaver(SAVE_FILE)
+        self.autosaver.start()
+        self.last_save = time.monotonic()
+        try:
+            self.bank = PuzzleBank(BANK_FILE)
+        except (OSError, ValueError):
+            self.bank = None
+        self.btn_resume = None
+        self.event_handlers = {
+            pygame.QUIT: self.quit,
+            pygame.KEYDOWN: self.key_down,
+            pygame.MOUSEBUTTONDOWN: self.mouse_down,
+        }
+        self.event_handlers.update({event_type: self.expose for event_type in REDRAW_EVENTS})
+        # value keys are handled separately (see KEY_VALUES), rebinding a key is one dict entry
+        self.keymap = {
+            pygame.K_RETURN: self.place_selected,
+            pygame.K_BACKSPACE: lambda: self.board.clear(),
+            pygame.K_UP: lambda: self.move_selection(-1, 0),
+            pygame.K_DOWN: lambda: self.move_selection(1, 0),
+            pygame.K_LEFT: lambda: self.move_selection(0, -1),
+            pygame.K_RIGHT: lambda: self.move_selection(0, 1),
+        }
+        self.ctrl_keymap = {
+            pygame.K_z: lambda: self.step_journal(self.board.undo),
+            pygame.K_y: lambda: self.step_journal(self.board.redo),
+        }
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
+
+    '''
+	Returns the puzzle pool for a board size, starting it the first time the size is picked
+    Puzzles are generated in the background while the menu is shown
+
+	Parameters:
+    row_length is the board size
+	Return: PuzzlePool
+    '''
+    def get_pool(self, row_length):
+        if row_length not in self.pools:
+            difficulties = [scale_difficulty(difficulty, row_length) for difficulty in (EASY, MEDIUM, HARD)]
+            # the index keeps the same puzzle (up to symmetry) from coming up twice, canonical
+            # forms are only practical to compute for 9x9 boards and smaller
+            index = CanonicalIndex() if row_length <= 9 else None
+            self.pools[row_length] = PuzzlePool(difficulties, POOL_SIZE, row_length, index=index, pattern=PATTERN)
+            self.pools[row_length].start()
+        return self.pools[row_length]
 
     '''
 	Finds a scene using a given tag
@@ -147,135 +332,384 @@ class Game():
     '''
     def change_scene(self, scene):
         self.current_scene = scene
+        self.full_redraw = True
+
+    '''
+	Adds the RESUME button to the menu or takes it out, it is only offered while there is
+    a game to resume
+
+	Parameters:
+    shown is whether the button should be in the menu
+	Return: None
+    '''
+    def show_resume(self, shown):
+        menu = self.get_scene("MENU")
+        if self.btn_resume is None or (self.btn_resume in menu.btns) == shown:
+            return
+        if shown:
+            menu.btns.append(self.btn_resume)
+        else:
+            menu.btns.remove(self.btn_resume)
+        menu.index_buttons()
+        if self.current_scene is menu:
+            self.full_redraw = True
 
     '''
 	Gives the game a new board
+    Puzzles come from the bank when it has puzzles of the picked size and difficulty,
+    otherwise from the pool
 
 	Parameters:
-    difficulty is the number of cells to be removed
+    difficulty is the number of cells to be removed from a 9x9 board, scaled to the picked size
 	Return: None
     '''
     def gen_board(self, difficulty):
-        self.board = board.Board(SCREEN_RES[0] - GAME_BORDER[0], SCREEN_RES[1] - GAME_BORDER[1], self.screen, difficulty)
+        difficulty = scale_difficulty(difficulty, self.row_length)
+        if self.bank is not None and self.bank.row_length == self.row_length and self.bank.size(difficulty) > 0:
+            source = self.bank
+        else:
+            source = self.get_pool(self.row_length)
+        self.board = board.Board(SCREEN_RES[0] - GAME_BORDER[0], SCREEN_RES[1] - GAME_BORDER[1], self.screen, difficulty, source)
+        self.elapsed = 0.0
+
+    '''
+	Gives the game the board saved in SAVE_FILE
+
+	Parameters: None
+	Return: boolean (False if there is no save that can be loaded)
+    '''
+    def resume(self):
+        try:
+            saved = load_game(SAVE_FILE)
+        except (OSError, ValueError):
+            return False
+        self.board = board.Board(SCREEN_RES[0] - GAME_BORDER[0], SCREEN_RES[1] - GAME_BORDER[1], self.screen,
+                                 saved.difficulty, puzzle=saved.puzzle, solution=saved.solution)
+        self.board.load_state(saved)
+        self.elapsed = saved.elapsed
+        return True
+
+    '''
+	Hands the board in play to the autosaver, the file is written on its thread
+
+	Parameters: None
+	Return: None
+    '''
+    def autosave(self):
+        self.last_save = time.monotonic()
+        self.autosaver.save(pack_game(self.board, self.elapsed))
+
+    '''
+	Shows the win or lose scene once the board is full
+
+	Parameters: None
+	Return: None
+    '''
+    def check_finished(self):
+        if self.board.is_full():
+            if self.board.check_board():
+                scene = self.get_scene("WIN")
+            else:
+                scene = self.get_scene("LOSE")
+            self.change_scene(scene)
+            # a finished game can't be resumed
+            self.autosaver.save(DELETE)
+            self.show_resume(False)
+
+    '''
+	Selects the cell of the next logical move and sketches its value there,
+    the player still places it with enter
+
+	Parameters: None
+	Return: Hint or None
+    '''
+    def show_hint(self):
+        hint = self.board.hint()
+        if hint is not None:
+            self.board.select(hint.row, hint.col)
+            # a mistake is only selected, the wrong value has to be cleared first
+            self.board.sketch(hint.num)
+        return hint
 
     '''
 	Handles exit, keyboard, and mouse operations
+    Each event goes straight to its handler in event_handlers, keys are looked up in the
+    keymaps and clicks in the scene's hit grid, so nothing is tested one case at a time
+
+	Parameters:
+    events is the list of pygame events to handle (defaults to pygame.event.get())
+	Return: None
+    '''
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
+            handler = self.event_handlers.get(event.type)
+            if handler is not None:
+                handler(event)
+
+    '''
+	Stops the main loop when the X button is clicked
+
+	Parameters:
+    event is the pygame QUIT event
+	Return: None
+    '''
+    def quit(self, event):
+        self.running = False
+
+    '''
+	Redraws the whole screen after the window was uncovered, shown, or restored
+
+	Parameters:
+    event is one of the REDRAW_EVENTS
+	Return: None
+    '''
+    def expose(self, event):
+        self.full_redraw = True
+
+    '''
+	Handles a key press through the keymaps
+    Ctrl bindings work whenever a board exists, every other key needs a selected cell.
+    Ctrl combinations that aren't bound do nothing, so e.g. ctrl+A never types a value
+
+	Parameters:
+    event is the pygame KEYDOWN event
+	Return: None
+    '''
+    def key_down(self, event):
+        if not self.board:
+            return
+        if event.mod & pygame.KMOD_CTRL:
+            handler = self.ctrl_keymap.get(event.key)
+            if handler is not None:
+                handler()
+            return
+        if self.board.selected_cell is None:
+            return
+        handler = self.keymap.get(event.key)
+        if handler is not None:
+            handler()
+        # value keys sketch, or with shift held add to or remove from the notes,
+        # only as far as the board size goes
+        value = KEY_VALUES.get(event.key)
+        if value is not None and value <= self.board.row_length:
+            if event.mod & pygame.KMOD_SHIFT:
+                self.board.toggle_note(value)
+            else:
+                self.board.sketch(value)
+
+    '''
+	Handles a click on a button of the current scene, or on the board
+
+	Parameters:
+    event is the pygame MOUSEBUTTONDOWN event
+	Return: None
+    '''
+    def mouse_down(self, event):
+        clicked_btn = self.current_scene.button_at(event.pos)
+        if clicked_btn is not None:
+            if clicked_btn.action is not None:
+                clicked_btn.action(clicked_btn)
+        elif self.board:
+            # allows the user to select a cell with their mouse
+            self.board.click(event.pos[0], event.pos[1])
+
+    '''
+	Enter places the sketched value and checks for win/loss
 
 	Parameters: None
 	Return: None
     '''
-    def handle_events(self):
-        for event in pygame.event.get():
-            # when the X button is clicked
-            if event.type == pygame.QUIT:
-                self.running = False
-
-            # handles key presses
-            if event.type == pygame.KEYDOWN:
-                # all keyboard operations only happen if a board exists and a cell is selected
-                if self.board:
-                    if self.board.selected_cell:
-
-                        # enter key places values if sketched, checks for win/loss
-                        if event.key == pygame.K_RETURN:
-                            self.board.place_number()
-                            if self.board.is_full():
-                                if self.board.check_board():
-                                    scene = self.get_scene("WIN")
-                                else:
-                                    scene = self.get_scene("LOSE")
-                                self.change_scene(scene)
-
-                        # backspace clears the current cell
-                        if event.key == pygame.K_BACKSPACE:
-                            self.board.clear()
-
-                        # searches all keypresses for 1-9 to be placed as a sketch
-                        if event.key in NUMBERS:
-                            self.board.sketch(NUMBERS.index(event.key)+1)
-
-                        # arrow keys move the selected cell around
-                        row = self.board.selected_cell.row
-                        col = self.board.selected_cell.col
-
-                        if event.key == pygame.K_UP:
-                            # up doesn't go out of bounds because -1 resets to end
-                            self.board.selected_cell = self.board.cells[row-1][col]
-
-                        if event.key == pygame.K_LEFT:
-                            # left doesn't go out of bounds because -1 resets to end
-                            self.board.selected_cell = self.board.cells[row][col-1]
-
-                        if event.key == pygame.K_DOWN:
-                            # down can reach row 9 (doesn't exist), so we have to reset to 0
-                            if row == ROW_LENGTH - 1:
-                                self.board.selected_cell = self.board.cells[0][col]
-                            else:
-                                self.board.selected_cell = self.board.cells[row+1][col]
-
-                        if event.key == pygame.K_RIGHT:
-                            # right can reach col 9 (doesn't exist), so we have to reset to 0
-                            if col == ROW_LENGTH - 1:
-                                self.board.selected_cell = self.board.cells[row][0]
-                            else:
-                                self.board.selected_cell = self.board.cells[row][col+1]
-
-            # handles clicks
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # finds the clicked button
-                clicked_btn = None
-                for obj in self.current_scene.btns:
-                    if obj.border_rect.collidepoint(event.pos):
-                        clicked_btn = obj
-                
-                if clicked_btn:
-                    # difficulty buttons change scene to game and generate a board using value
-                    if self.current_scene.tag == "MENU":
-                        self.gen_board(clicked_btn.value)
-                        self.change_scene(self.get_scene("GAME"))
-                    # closes sudoku
-                    if clicked_btn.text == "EXIT":
-                        self.running = False
-                    # resets the board to its original state
-                    elif clicked_btn.text == "RESET":
-                        self.board.reset_to_original()
-                    # sends the user back to the menu
-                    elif clicked_btn.text == "RESTART":
-                        self.change_scene(self.get_scene("MENU"))
-                else:
-                    # allows the user to select a cell with their mouse
-                    if self.board:
-                        self.board.click(event.pos[0], event.pos[1])
+    def place_selected(self):
+        self.board.place_number()
+        self.check_finished()
+
+    '''
+	Undoes or redoes a move and checks for win/loss, since either can fill the last cell
+    (redoing a place, or undoing a clear)
+
+	Parameters:
+    step is the board's undo or redo method
+	Return: None
+    '''
+    def step_journal(self, step):
+        if step():
+            self.check_finished()
+
+    '''
+	Moves the selection, wrapping around the edges of the board
+    Selection goes through select so the old and new cells get redrawn
+
+	Parameters:
+    rows and cols are how far to move
+	Return: None
+    '''
+    def move_selection(self, rows, cols):
+        row, col = self.board.selected
+        n = self.board.row_length
+        self.board.select((row + rows) % n, (col + cols) % n)
+
+    '''
+	Difficulty buttons change scene to game and generate a board using their value
+
+	Parameters:
+    btn is the clicked button
+	Return: None
+    '''
+    def click_difficulty(self, btn):
+        self.gen_board(btn.value)
+        self.change_scene(self.get_scene("GAME"))
+
+    '''
+	The size button cycles through the board sizes, and starts generating
+    puzzles of the new size while the player picks a difficulty
+
+	Parameters:
+    btn is the clicked button
+	Return: None
+    '''
+    def click_size(self, btn):
+        self.row_length = SIZES[(SIZES.index(self.row_length) + 1) % len(SIZES)]
+        btn.set_text("SIZE: %dx%d" % (self.row_length, self.row_length))
+        # the new text changes the button size
+        self.current_scene.index_buttons()
+        self.get_pool(self.row_length)
+
+    '''
+	Continues the saved game, the button is dropped if the save can't be loaded
+
+	Parameters:
+    btn is the clicked button
+	Return: None
+    '''
+    def click_resume(self, btn):
+        if self.resume():
+            self.change_scene(self.get_scene("GAME"))
+        else:
+            self.show_resume(False)
+
+    '''
+	Closes sudoku
+
+	Parameters:
+    btn is the clicked button
+	Return: None
+    '''
+    def click_exit(self, btn):
+        self.running = False
+
+    '''
+	Places every naked single until none are left
+
+	Parameters:
+    btn is the clicked button
+	Return: None
+    '''
+    def click_fill(self, btn):
+        self.board.fill_singles()
+        self.check_finished()
+
+    '''
+	Sends the user back to the menu, saving the game in play so it can be resumed
+
+	Parameters:
+    btn is the clicked button
+	Return: None
+    '''
+    def click_restart(self, btn):
+        if self.current_scene.tag == "GAME":
+            self.autosave()
+            self.show_resume(True)
+        self.change_scene(self.get_scene("MENU"))
 
     '''
 	Draws the current scene to the screen
+    After a scene change everything is drawn, otherwise only the rects reported
+    by the scene objects and the board are cleared and redrawn
 
 	Parameters: None
-	Return: None
+	Return: list[pygame.Rect] (the screen areas that were drawn)
     '''
     def render(self):
+        board_shown = self.current_scene.tag == "GAME"
+        if self.full_redraw:
+            self.full_redraw = False
+            self.current_scene.pop_dirty_rects()
+            if self.board:
+                self.board.pop_dirty_rects()
+            self.screen.fill(WHITE)
+            self.current_scene.render(self.screen)
+            if board_shown:
+                self.board.draw()
+            return [self.screen.get_rect()]
+
+        rects = self.current_scene.pop_dirty_rects()
+        if self.board:
+            board_rects = self.board.pop_dirty_rects()
+            if board_shown:
+                rects += board_rects
+        for rect in rects:
+            # clipping keeps thick grid lines and neighbors from drawing outside the rect
+            self.screen.set_clip(rect)
+            self.screen.fill(WHITE, rect)
+            self.current_scene.render(self.screen, rect)
+            if board_shown:
+                self.board.draw(rect)
+        self.screen.set_clip(None)
+        return rects
+
+    '''
+	Determines if anything needs to be drawn
+
+	Parameters: None
+	Return: boolean
+    '''
+    def needs_render(self):
+        if self.full_redraw:
+            return True
         for obj in self.current_scene.btns + self.current_scene.lbls:
-            obj.render(self.screen)
-        if self.current_scene.tag == "GAME":
-            self.board.draw()
+            if obj.dirty_rects:
+                return True
+        return bool(self.board and self.board.dirty_rects)
 
     '''
 	Main game loop for events and rendering
+    Only changed areas are redrawn and sent to the display, and when nothing
+    has changed the loop sleeps until the next event instead of spinning
 
 	Parameters: None
 	Return: None
     '''
     def loop(self):
         while self.running:
-            # sets the background of the game to white
-            self.screen.fill(WHITE)
-
-            self.handle_events()
+            if self.needs_render():
+                events = pygame.event.get()
+            else:
+                # blocks without using CPU until something happens
+                events = [pygame.event.wait()] + pygame.event.get()
+
+            self.handle_events(events)
+
+            rects = self.render()
+            if rects:
+                pygame.display.update(rects)
+            # the time spent waiting for events counts too, the player is still thinking
+            seconds = self.clock.tick(FPS) / 1000
+            if self.current_scene.tag == "GAME":
+                self.elapsed += seconds
+                if time.monotonic() - self.last_save >= AUTOSAVE_SECONDS:
+                    self.autosave()
 
-            self.render()
-
-            pygame.display.update()
-            self.clock.tick()
+        if self.current_scene.tag == "GAME":
+            self.autosave()
+        # waits for the last save, which is only a small file
+        self.autosaver.stop()
+        # a 25x25 puzzle can take a second or two to finish, which the player shouldn't wait for
+        for pool in self.pools.values():
+            pool.stop(wait=False)
+        if self.bank is not None:
+            self.bank.close()
 
 '''
 Generates the game layout with labels, buttons, and scenes
@@ -292,13 +726,18 @@ def generate_game():
     btn_easy = Button("EASY", (width / 3, height * 2 / 3), EASY, background_color=GREEN)
     btn_medium = Button("MEDIUM", (width / 2, height * 2 / 3), MEDIUM, background_color=YELLOW)
     btn_hard = Button("HARD", (width * 2 / 3, height * 2 / 3), HARD, background_color=RED)
-    scn_menu = Scene("MENU", [btn_easy, btn_medium, btn_hard], [lbl_menu, lbl_mode])
+    btn_size = Button("SIZE: %dx%d" % (ROW_LENGTH, ROW_LENGTH), (width / 2, height * 5 / 6), ROW_LENGTH, background_color=LIGHT_BLUE)
+    # only added to the menu while there is a game to resume (see Game.show_resume)
+    btn_resume = Button("RESUME", (width / 2, height * 3 / 4), background_color=LIGHT_BLUE)
+    scn_menu = Scene("MENU", [btn_easy, btn_medium, btn_hard, btn_size], [lbl_menu, lbl_mode])
 
     # game elements
-    btn_game_reset = Button("RESET", (width / 3, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
-    btn_game_restart = Button("RESTART", (width / 2, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
-    btn_game_exit = Button("EXIT", (width * 2 / 3, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
-    scn_game = Scene("GAME", [btn_game_reset, btn_game_restart, btn_game_exit])
+    btn_game_hint = Button("HINT", (width / 6, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
+    btn_game_fill = Button("FILL", (width * 2 / 6, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
+    btn_game_reset = Button("RESET", (width * 3 / 6, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
+    btn_game_restart = Button("RESTART", (width * 4 / 6, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
+    btn_game_exit = Button("EXIT", (width * 5 / 6, (height * 2 - GAME_BORDER[1]) / 2), background_color=LIGHT_BLUE)
+    scn_game = Scene("GAME", [btn_game_hint, btn_game_fill, btn_game_reset, btn_game_restart, btn_game_exit])
 
     # win screen elements
     lbl_win = Label("Game Won!", (width / 2, height / 3))
@@ -310,5 +749,19 @@ def generate_game():
     btn_lose_restart = Button("RESTART", (width / 2, height * 2 / 3), font_size=48, background_color=LIGHT_BLUE)
     scn_lose = Scene("LOSE", [btn_lose_restart], [lbl_lose])
 
-    # create the game with the scenes
-    return Game([scn_menu, scn_game, scn_win, scn_lose])
+    # create the game with the scenes, then connect the buttons to it
+    game = Game([scn_menu, scn_game, scn_win, scn_lose])
+    for btn in (btn_easy, btn_medium, btn_hard):
+        btn.action = game.click_difficulty
+    btn_size.action = game.click_size
+    btn_resume.action = game.click_resume
+    game.btn_resume = btn_resume
+    game.show_resume(os.path.exists(SAVE_FILE))
+    btn_game_hint.action = lambda btn: game.show_hint()
+    btn_game_fill.action = game.click_fill
+    btn_game_reset.action = lambda btn: game.board.reset_to_original()
+    for btn in (btn_game_restart, btn_lose_restart):
+        btn.action = game.click_restart
+    for btn in (btn_game_exit, btn_win_exit):
+        btn.action = game.click_exit
+    return game
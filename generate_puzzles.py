@@ -0,0 +1,142 @@
+import argparse
+import math
+import multiprocessing
+import random
+import sys
+from constants import DIFFICULTIES, ROW_LENGTH
+from sudoku_generator import generate_sudoku, scale_difficulty, PATTERNS
+from canonical import CanonicalIndex, canonical_form
+from packed_board import PackedBoard
+
+"""
+Headless bulk puzzle generator
+Spreads puzzle generation over a multiprocessing pool and streams the results to a file,
+one puzzle per line as "<row_length**2 digits, 0 for empty> <difficulty name>"
+(comma separated values for boards larger than 9x9, see PackedBoard.from_string)
+Workers also compute each puzzle's canonical form, and puzzles equivalent to one already
+written are dropped and replaced (unless --allow-duplicates is given, or the board is
+larger than 9x9, where canonical forms are too slow to compute)
+This does not import pygame, so workers start quickly
+
+Example:
+python generate_puzzles.py 10000 --mix easy=1,medium=2,hard=1 --seed 42 -o puzzles.txt
+python generate_puzzles.py 100 --size 16 --unique -o puzzles16.txt
+
+"""
+
+# rounds generated to replace duplicates before giving up, small boards can run out of distinct puzzles
+MAX_ROUNDS = 20
+
+'''
+Parses a difficulty mix like "easy=1,medium=2,hard=1" into weights
+
+Parameters:
+text is the mix from the command line
+
+Return: list[tuple(str, float)]
+'''
+def parse_mix(text):
+    mix = []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip().lower()
+        if name not in DIFFICULTIES:
+            raise argparse.ArgumentTypeError("unknown difficulty '%s'" % name)
+        try:
+            weight = float(weight) if weight else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError("bad weight for '%s'" % name)
+        if weight < 0:
+            raise argparse.ArgumentTypeError("negative weight for '%s'" % name)
+        mix.append((name, weight))
+    if sum(weight for name, weight in mix) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one positive weight")
+    return mix
+
+'''
+Worker task - generates one chunk of puzzles
+Every chunk draws from its own generator seeded from (seed, chunk index), so the output
+does not depend on which worker runs which chunk or on the number of workers
+
+Parameters:
+task is a tuple (seed, chunk index, number of puzzles, mix, unique, dedup, size, pattern)
+
+Return: list[tuple(str, bytes)] (the output lines of the chunk with their canonical forms, None if not dedup)
+'''
+def generate_chunk(task):
+    seed, index, count, mix, unique, dedup, size, pattern = task
+    rng = random.Random(seed * 1000003 + index)
+    names = [name for name, weight in mix]
+    weights = [weight for name, weight in mix]
+    lines = []
+    for i in range(count):
+        name = rng.choices(names, weights)[0]
+        board = generate_sudoku(size, scale_difficulty(DIFFICULTIES[name], size), unique, rng=rng, pattern=pattern)
+        line = str(PackedBoard.from_grid(board)) + " " + name + "\n"
+        lines.append((line, canonical_form(board) if dedup else None))
+    return lines
+
+'''
+Command line entry point
+
+Parameters:
+argv is the list of command line arguments (defaults to sys.argv[1:])
+
+Return: None
+'''
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate sudoku puzzles in parallel.")
+    parser.add_argument("count", type=int, help="number of puzzles to generate")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("easy,medium,hard"),
+                        help="difficulty weights, e.g. easy=1,medium=2,hard=1 (default: equal)")
+    parser.add_argument("--seed", type=int, default=None, help="base seed, the same seed gives the same output")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=100, help="puzzles per worker task")
+    parser.add_argument("--size", type=int, default=ROW_LENGTH, help="rows/columns of the board, a perfect square (default: 9)")
+    parser.add_argument("--unique", action="store_true", help="only output puzzles with one solution")
+    parser.add_argument("--pattern", choices=list(PATTERNS), default="random", help="shape of the removed cells (default: random)")
+    parser.add_argument("--allow-duplicates", action="store_true", help="keep puzzles equivalent to earlier ones")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.count < 0 or args.chunk_size < 1 or args.workers < 1:
+        parser.error("count must be >= 0, chunk size and workers must be >= 1")
+    if args.size < 4 or math.isqrt(args.size) ** 2 != args.size:
+        parser.error("size must be a perfect square of at least 4")
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    dedup = not args.allow_duplicates and args.size <= ROW_LENGTH
+    index = CanonicalIndex()
+    written = 0
+    next_chunk = 0
+    rounds = 0
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            # every round asks for the puzzles still missing, duplicates make another round necessary
+            while written < args.count and rounds < MAX_ROUNDS:
+                rounds += 1
+                before = written
+                tasks = []
+                for start in range(0, args.count - written, args.chunk_size):
+                    tasks.append((seed, next_chunk, min(args.chunk_size, args.count - written - start), args.mix, args.unique, dedup, args.size, args.pattern))
+                    next_chunk += 1
+                # imap keeps chunk order, and each chunk is written as soon as it and the ones before it are done
+                for lines in pool.imap(generate_chunk, tasks):
+                    for line, form in lines:
+                        if written < args.count and (not dedup or index.add(None, form)):
+                            out.write(line)
+                            written += 1
+                if written == before:
+                    # a whole round of duplicates, there are (almost) no distinct puzzles left
+                    break
+        if dedup and index.duplicates:
+            print("replaced %d duplicate puzzles" % index.duplicates, file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if written < args.count:
+        sys.exit("only found %d distinct puzzles of the %d asked for, use --allow-duplicates to write the rest" % (written, args.count))
+
+if __name__ == "__main__":
+    main()
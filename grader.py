@@ -0,0 +1,362 @@
+import math
+from collections import namedtuple
+from solver import parse_board
+from lookup_tables import get_tables
+
+"""
+Grades puzzles by solving them the way a person would
+Techniques are tried from easiest to hardest and the search restarts from the easiest
+one after every step, so the hardest technique used is the one the puzzle really needs.
+The score adds up the weight of every step, so a puzzle that needs many hard steps
+scores higher than one that needs a single hard step
+
+"""
+
+# (name, weight, level) - level 1 easy, 2 medium, 3 hard, 4 expert
+NAKED_SINGLE = ("naked single", 1, 1)
+HIDDEN_SINGLE = ("hidden single", 2, 1)
+POINTING = ("pointing", 8, 2)
+CLAIMING = ("claiming", 8, 2)
+NAKED_PAIR = ("naked pair", 10, 2)
+HIDDEN_PAIR = ("hidden pair", 15, 3)
+NAKED_TRIPLE = ("naked triple", 20, 3)
+X_WING = ("x-wing", 30, 3)
+# none of the techniques make progress, so a person would have to guess
+GUESS = ("guess", 200, 4)
+
+LEVEL_NAMES = {1: "easy", 2: "medium", 3: "hard", 4: "expert"}
+
+# number of ratings kept by grade before the oldest are dropped
+RATING_CACHE_SIZE = 100000
+
+Rating = namedtuple("Rating", ["score", "technique", "level", "solved"])
+
+class Grader():
+    '''
+	Solves one puzzle with human techniques and records what was needed
+    This should initialize:
+    self.row_length     - the number of rows/columns of the board
+    self.values         - a flat list of values, 0 for empty
+    self.cand           - a flat list of candidate bitmasks (bit n set if n can go in the cell)
+    self.score          - the total weight of the steps taken so far
+    self.hardest        - the hardest technique used so far
+    self.placed         - (flat index, value) of the last value placed, or None
+    self.rows, self.cols, self.boxes, self.units, self.peers, self.row_of, self.col_of, self.box_of
+                        - the shared lookup tables of the board size (see lookup_tables.py)
+
+	Parameters:
+    board is a 2D list of ints, a PackedBoard, or a string (see solver.parse_board)
+    cand is an optional flat list of the board's candidate bitmasks (e.g. BoardState.cand) to
+    start from instead of computing them, it is copied
+
+	Return: None
+    '''
+    def __init__(self, board, cand=None):
+        self.values = parse_board(board)
+        self.row_length = math.isqrt(len(self.values))
+        n = self.row_length
+        self.full_mask = ((1 << n) - 1) << 1
+        tables = get_tables(n)
+        self.rows = tables.rows
+        self.cols = tables.cols
+        self.boxes = tables.boxes
+        self.units = tables.units
+        self.box_of = tables.box_of
+        self.peers = tables.peers
+        self.row_of = tables.row_of
+        self.col_of = tables.col_of
+        self.score = 0
+        self.hardest = None
+        self.placed = None
+        self.techniques = [
+            (NAKED_SINGLE, self.naked_single),
+            (HIDDEN_SINGLE, self.hidden_single),
+            (POINTING, self.pointing),
+            (CLAIMING, self.claiming),
+            (NAKED_PAIR, self.naked_pair),
+            (HIDDEN_PAIR, self.hidden_pair),
+            (NAKED_TRIPLE, self.naked_triple),
+            (X_WING, self.x_wing),
+        ]
+
+        if cand is not None:
+            self.cand = list(cand)
+            return
+        self.cand = [0] * (n * n)
+        for i in range(n * n):
+            if self.values[i] == 0:
+                used = 0
+                for p in self.peers[i]:
+                    used |= 1 << self.values[p]
+                self.cand[i] = ~used & self.full_mask
+
+    '''
+	Applies techniques until the puzzle is solved or no technique makes progress
+
+	Parameters: None
+	Return: Rating
+    '''
+    def grade(self):
+        while 0 in self.values:
+            for technique, step in self.techniques:
+                if step():
+                    self.used(technique)
+                    break
+            else:
+                self.used(GUESS)
+                return self.rating(False)
+        return self.rating(True)
+
+    '''
+	Applies techniques until one more value is placed
+    The hardest technique used on the way is left in self.hardest
+
+	Parameters: None
+	Return: tuple(int, int) or None ((flat index, value) of the placed value, None if a guess is needed)
+    '''
+    def next_placement(self):
+        self.placed = None
+        while self.placed is None and 0 in self.values:
+            for technique, step in self.techniques:
+                if step():
+                    self.used(technique)
+                    break
+            else:
+                return None
+        return self.placed
+
+    '''
+	Records one step of a technique
+
+	Parameters:
+    technique is the (name, weight, level) tuple of the technique
+	Return: None
+    '''
+    def used(self, technique):
+        self.score += technique[1]
+        if self.hardest is None or technique[2] > self.hardest[2] or (technique[2] == self.hardest[2] and technique[1] > self.hardest[1]):
+            self.hardest = technique
+
+    '''
+	Builds the result of the grading
+
+	Parameters:
+    solved is whether the techniques finished the puzzle
+	Return: Rating
+    '''
+    def rating(self, solved):
+        hardest = self.hardest or NAKED_SINGLE
+        return Rating(self.score, hardest[0], hardest[2], solved)
+
+    '''
+	Places num at flat index i and removes it from the candidates of every peer
+
+	Parameters:
+    i is the flat cell index
+    num is the value placed
+	Return: None
+    '''
+    def place(self, i, num):
+        self.values[i] = num
+        self.cand[i] = 0
+        self.placed = (i, num)
+        bit = ~(1 << num)
+        for p in self.peers[i]:
+            self.cand[p] &= bit
+
+    '''
+	Removes the digits in mask from the candidates of the given cells
+
+	Parameters:
+    cells is a list of flat indices
+    mask is the bitmask of digits to remove
+	Return: boolean (whether anything was removed)
+    '''
+    def eliminate(self, cells, mask):
+        changed = False
+        for i in cells:
+            if self.cand[i] & mask:
+                self.cand[i] &= ~mask
+                changed = True
+        return changed
+
+    '''
+	Returns the cells of unit where digit bit is still a candidate
+
+	Parameters:
+    unit is a list of flat indices
+    bit is the digit as a bitmask
+	Return: list[int]
+    '''
+    def places(self, unit, bit):
+        return [i for i in unit if self.cand[i] & bit]
+
+    # a cell with one candidate left
+    def naked_single(self):
+        for i in range(len(self.values)):
+            mask = self.cand[i]
+            if mask and mask & (mask - 1) == 0:
+                self.place(i, mask.bit_length() - 1)
+                return True
+        return False
+
+    # a digit with one place left in a unit
+    def hidden_single(self):
+        for unit in self.units:
+            once = 0
+            twice = 0
+            for i in unit:
+                twice |= once & self.cand[i]
+                once |= self.cand[i]
+            hidden = once & ~twice
+            if hidden:
+                bit = hidden & -hidden
+                self.place(self.places(unit, bit)[0], bit.bit_length() - 1)
+                return True
+        return False
+
+    # a digit confined to one row or col within a box is removed from the rest of that row or col
+    def pointing(self):
+        n = self.row_length
+        for b, box in enumerate(self.boxes):
+            for num in range(1, n + 1):
+                cells = self.places(box, 1 << num)
+                if len(cells) < 2:
+                    continue
+                for lines, line_of in ((self.rows, self.row_of), (self.cols, self.col_of)):
+                    line = line_of[cells[0]]
+                    if all(line_of[i] == line for i in cells):
+                        outside = [i for i in lines[line] if self.box_of[i] != b]
+                        if self.eliminate(outside, 1 << num):
+                            return True
+        return False
+
+    # a digit confined to one box within a row or col is removed from the rest of that box
+    def claiming(self):
+        n = self.row_length
+        for line in self.rows + self.cols:
+            for num in range(1, n + 1):
+                cells = self.places(line, 1 << num)
+                if len(cells) < 2:
+                    continue
+                box = self.box_of[cells[0]]
+                if all(self.box_of[i] == box for i in cells):
+                    outside = [i for i in self.boxes[box] if i not in line]
+                    if self.eliminate(outside, 1 << num):
+                        return True
+        return False
+
+    # two cells in a unit with the same two candidates own those digits
+    def naked_pair(self):
+        for unit in self.units:
+            pairs = {}
+            for i in unit:
+                mask = self.cand[i]
+                if mask.bit_count() == 2:
+                    if mask in pairs:
+                        others = [k for k in unit if k != i and k != pairs[mask]]
+                        if self.eliminate(others, mask):
+                            return True
+                    else:
+                        pairs[mask] = i
+        return False
+
+    # two digits that only fit in the same two cells of a unit remove every other candidate there
+    def hidden_pair(self):
+        n = self.row_length
+        for unit in self.units:
+            spots = {}
+            for num in range(1, n + 1):
+                cells = tuple(self.places(unit, 1 << num))
+                if len(cells) == 2:
+                    if cells in spots:
+                        keep = (1 << num) | (1 << spots[cells])
+                        if self.eliminate(cells, ~keep & self.full_mask):
+                            return True
+                    else:
+                        spots[cells] = num
+        return False
+
+    # three cells in a unit whose candidates together are only three digits own those digits
+    def naked_triple(self):
+        for unit in self.units:
+            small = [i for i in unit if 2 <= self.cand[i].bit_count() <= 3]
+            for a in range(len(small)):
+                for b in range(a + 1, len(small)):
+                    for c in range(b + 1, len(small)):
+                        mask = self.cand[small[a]] | self.cand[small[b]] | self.cand[small[c]]
+                        if mask.bit_count() == 3:
+                            triple = (small[a], small[b], small[c])
+                            others = [i for i in unit if i not in triple]
+                            if self.eliminate(others, mask):
+                                return True
+        return False
+
+    # a digit limited to the same two cols in two rows is removed from the rest of those cols (and the transpose)
+    def x_wing(self):
+        n = self.row_length
+        for lines, crosses, cross_of in ((self.rows, self.cols, self.col_of), (self.cols, self.rows, self.row_of)):
+            for num in range(1, n + 1):
+                bit = 1 << num
+                seen = {}
+                for index, line in enumerate(lines):
+                    cells = self.places(line, bit)
+                    if len(cells) != 2:
+                        continue
+                    key = (cross_of[cells[0]], cross_of[cells[1]])
+                    if key in seen:
+                        corners = set(cells) | set(seen[key])
+                        others = [i for k in key for i in crosses[k] if i not in corners]
+                        if self.eliminate(others, bit):
+                            return True
+                    else:
+                        seen[key] = cells
+        return False
+
+# memoized ratings by canonical_key
+ratings = {}
+
+'''
+Returns a key that is the same for equivalent puzzles, since transposing, swapping bands,
+stacks, rows, or cols, and relabeling never change which techniques are needed
+This only matches puzzles that differ by relabeled digits, it costs one pass over the
+cells, while canonical.canonical_form matches every equivalent puzzle but can take
+longer than grading
+
+Parameters:
+board is a 2D list of ints, a PackedBoard, or a string (see solver.parse_board)
+
+Return: bytes
+'''
+def canonical_key(board):
+    labels = {0: 0}
+    key = bytearray()
+    for num in parse_board(board):
+        if num not in labels:
+            labels[num] = len(labels)
+        key.append(labels[num])
+    return bytes(key)
+
+'''
+Grades a puzzle, reusing the rating of any equivalent puzzle graded before
+
+Parameters:
+board is a 2D list of ints, a PackedBoard, or a string (see solver.parse_board)
+key is an optional cache key, callers that already have canonical.canonical_form(board)
+can pass it so every equivalent puzzle shares one rating (a canonical form is itself a
+relabel key of an equivalent puzzle, so the two kinds of key never give a wrong rating).
+Defaults to canonical_key(board)
+
+Return: Rating (score, hardest technique name, level 1-4, and whether techniques solved it)
+'''
+def grade(board, key=None):
+    if key is None:
+        key = canonical_key(board)
+    rating = ratings.get(key)
+    if rating is None:
+        rating = Grader(board).grade()
+        if len(ratings) >= RATING_CACHE_SIZE:
+            # dicts keep insertion order, so this drops the oldest rating
+            del ratings[next(iter(ratings))]
+        ratings[key] = rating
+    return rating
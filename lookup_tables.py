@@ -0,0 +1,81 @@
+import math
+from collections import namedtuple
+
+"""
+Lookup tables shared by the generator, solver, grader, game logic, and renderer
+Everything about a board's shape (which cells form each row, col, and box, which cells
+see each other, which box a cell is in) and where each cell is drawn is built once per
+size and then only indexed, so hot loops do no coordinate arithmetic or allocation.
+Cells are numbered by flat index, row * row_length + col
+This does not import pygame, rects are plain (x, y, width, height) tuples
+
+"""
+
+# rows, cols, and boxes are lists of flat indices, units is all of them together
+# peers[i] is the sorted flat indices sharing a row, col, or box with cell i
+# row_of, col_of, and box_of map a flat index to its row, col, and box
+# box_grid[row][col] is the box of (row, col), box_start[b] is the (row, col) of the top left cell of box b
+Tables = namedtuple("Tables", ["row_length", "box_length", "rows", "cols", "boxes", "units", "peers",
+                               "row_of", "col_of", "box_of", "box_grid", "box_start"])
+
+# row_length -> Tables
+tables = {}
+# (row_length, width, height) -> (rects, centers, note_centers)
+pixel_tables = {}
+
+'''
+Returns the lookup tables of a board size, building them the first time the size is used
+
+Parameters:
+row_length is the number of rows/columns of the board (a perfect square)
+
+Return: Tables
+'''
+def get_tables(row_length):
+    if row_length not in tables:
+        n = row_length
+        box = math.isqrt(n)
+        rows = [[r * n + c for c in range(n)] for r in range(n)]
+        cols = [[r * n + c for r in range(n)] for c in range(n)]
+        boxes = [[(b // box * box + k // box) * n + b % box * box + k % box for k in range(n)] for b in range(n)]
+        row_of = [i // n for i in range(n * n)]
+        col_of = [i % n for i in range(n * n)]
+        box_of = [r // box * box + c // box for r in range(n) for c in range(n)]
+        peers = []
+        for i in range(n * n):
+            cell_peers = set(rows[row_of[i]] + cols[col_of[i]] + boxes[box_of[i]])
+            cell_peers.discard(i)
+            peers.append(sorted(cell_peers))
+        box_grid = [box_of[r * n:(r + 1) * n] for r in range(n)]
+        box_start = [(b // box * box, b % box * box) for b in range(n)]
+        tables[row_length] = Tables(n, box, rows, cols, boxes, rows + cols + boxes, peers,
+                                    row_of, col_of, box_of, box_grid, box_start)
+    return tables[row_length]
+
+'''
+Returns where every cell of a board is drawn, building them the first time the size is used
+Centers are worked out from the rect rounded down the way pygame.Rect rounds it, so they
+match the rect the cell is drawn in
+
+Parameters:
+row_length is the number of rows/columns of the board
+width and height are the board size in pixels
+
+Return: tuple(list[tuple], list[tuple], list[list[tuple]]) (by flat index, the (x, y, width, height)
+rect of each cell, the (x, y) center of the cell, and the (x, y) centers of its notes 1 to
+row_length, laid out in a box_length x box_length mini grid)
+'''
+def cell_rects(row_length, width, height):
+    key = (row_length, width, height)
+    if key not in pixel_tables:
+        n = row_length
+        box = math.isqrt(n)
+        rects = [(width / n * c, height / n * r, width / n, height / n) for r in range(n) for c in range(n)]
+        centers = []
+        note_centers = []
+        for rect in rects:
+            x, y, w, h = (int(v) for v in rect)
+            centers.append((x + w // 2, y + h // 2))
+            note_centers.append([(x + (k % box + 0.5) * w / box, y + (k // box + 0.5) * h / box) for k in range(n)])
+        pixel_tables[key] = (rects, centers, note_centers)
+    return pixel_tables[key]
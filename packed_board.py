@@ -0,0 +1,174 @@
+import math
+
+class PackedBoard():
+    '''
+	An immutable, hashable board stored as one byte per cell (row_length**2 bytes)
+    A 9x9 board takes 81 bytes instead of 10 lists of Python ints, so large puzzle banks
+    and caches can be kept in memory, and copies are a single bytes copy
+    This should initialize:
+    self.cells          - bytes holding the values row by row, 0 for empty
+    self.row_length     - the number of rows/columns of the board
+
+	Parameters:
+    cells is a bytes-like object or iterable of ints with a perfect square length
+
+	Return: None
+    '''
+    __slots__ = ("cells", "row_length")
+
+    def __init__(self, cells):
+        self.cells = bytes(cells)
+        self.row_length = math.isqrt(len(self.cells))
+        if self.row_length ** 2 != len(self.cells):
+            raise ValueError("board must have a square number of cells, got %d" % len(self.cells))
+
+    '''
+	Creates a packed board from a 2D list like Board.board
+
+	Parameters:
+    grid is a 2D list of ints
+
+	Return: PackedBoard
+    '''
+    @classmethod
+    def from_grid(cls, grid):
+        return cls(num for row in grid for num in row)
+
+    '''
+	Creates a packed board from a string of digits, '0' or '.' for empty
+    Also reads the comma separated values str gives for boards larger than 9x9
+
+	Parameters:
+    text is the string of row_length**2 characters (or comma separated values)
+
+	Return: PackedBoard
+    '''
+    @classmethod
+    def from_string(cls, text):
+        text = text.strip()
+        if "," in text:
+            return cls(int(num) for num in text.split(","))
+        return cls(0 if ch in "0." else int(ch) for ch in text)
+
+    '''
+	Creates a packed board from the 4-bit format returned by to_nibbles
+
+	Parameters:
+    data is the bytes from to_nibbles
+    row_length is the number of rows/columns of the board
+
+	Return: PackedBoard
+    '''
+    @classmethod
+    def from_nibbles(cls, data, row_length=9):
+        cells = bytearray(row_length * row_length)
+        for i in range(len(cells)):
+            cells[i] = data[i >> 1] >> 4 if i & 1 == 0 else data[i >> 1] & 0x0F
+        return cls(cells)
+
+    '''
+	Packs two cells per byte (41 bytes for 9x9), only for boards with values up to 15
+
+	Parameters: None
+	Return: bytes
+    '''
+    def to_nibbles(self):
+        if self.row_length > 15:
+            raise ValueError("only boards up to 15x15 fit in 4 bits per cell")
+        cells = self.cells
+        data = bytearray((len(cells) + 1) // 2)
+        for i in range(len(cells)):
+            if i & 1 == 0:
+                data[i >> 1] = cells[i] << 4
+            else:
+                data[i >> 1] |= cells[i]
+        return bytes(data)
+
+    '''
+	Returns the board as a new 2D list like Board.board
+
+	Parameters: None
+	Return: list[list]
+    '''
+    def to_grid(self):
+        n = self.row_length
+        return [list(self.cells[i:i + n]) for i in range(0, n * n, n)]
+
+    '''
+	Returns the value at (row, col)
+
+	Parameters:
+    row and col are the row index and col index of the cell
+
+	Return: int
+    '''
+    def get(self, row, col):
+        return self.cells[row * self.row_length + col]
+
+    '''
+	Returns a new board with (row, col) set to value
+
+	Parameters:
+    row and col are the row index and col index of the cell
+    value is the new value, 0 for empty
+
+	Return: PackedBoard
+    '''
+    def with_value(self, row, col, value):
+        cells = bytearray(self.cells)
+        cells[row * self.row_length + col] = value
+        return PackedBoard(cells)
+
+    '''
+	Counts the nonzero cells
+
+	Parameters: None
+	Return: int
+    '''
+    def count(self):
+        return len(self.cells) - self.cells.count(0)
+
+    '''
+	Determines if the board is full and each row, col, and box holds every digit once
+
+	Parameters: None
+	Return: boolean
+    '''
+    def is_solved(self):
+        n = self.row_length
+        box = math.isqrt(n)
+        cells = self.cells
+        digits = set(range(1, n + 1))
+        for i in range(n):
+            if set(cells[i * n:(i + 1) * n]) != digits or set(cells[i::n]) != digits:
+                return False
+        for i in range(0, n, box):
+            for j in range(0, n, box):
+                box_cells = set()
+                for k in range(box):
+                    start = (i + k) * n + j
+                    box_cells.update(cells[start:start + box])
+                if box_cells != digits:
+                    return False
+        return True
+
+    # boards are immutable, so a copy can share the same bytes
+    def copy(self):
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, PackedBoard) and self.cells == other.cells
+
+    def __hash__(self):
+        return hash(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    # one character per cell up to 9x9, comma separated for larger boards
+    def __str__(self):
+        separator = "" if self.row_length <= 9 else ","
+        return separator.join(str(num) for num in self.cells)
+
+    def __repr__(self):
+        return "PackedBoard(%r)" % self.cells
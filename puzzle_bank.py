@@ -0,0 +1,244 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+from constants import DIFFICULTIES, ROW_LENGTH
+from packed_board import PackedBoard
+from save_game import write_atomic
+from solver import solve
+from sudoku_generator import scale_difficulty
+import grader
+
+"""
+Puzzle bank - a file of pre-generated puzzles that is memory mapped instead of loaded
+Layout (little endian), where n is the row length and cells = n * n:
+    header      magic "SDKB", version (u16), n (u8), padding (u8), number of records (u32),
+                number of difficulties (u16)
+    index       one (difficulty (u16), first record (u32), number of records (u32)) entry
+                per difficulty, difficulties are the number of removed cells
+    records     fixed-width (puzzle (cells bytes), solution (cells bytes), grade level (u8),
+                padding (u8), grade score (u16)), grouped by difficulty
+Puzzle k of a difficulty is one slice at a computed offset, so picking a puzzle reads a
+single record and never parses the rest of the file. The pages are mapped read only and
+shared, so every game process on a machine uses the same copy
+Banks are built from the output of generate_puzzles.py
+
+Example:
+python generate_puzzles.py 10000 --unique --seed 1 -o puzzles.txt
+python puzzle_bank.py puzzles.txt -o puzzles.bank
+
+"""
+
+MAGIC = b"SDKB"
+VERSION = 1
+HEADER = struct.Struct("<4sHBxIH")
+INDEX_ENTRY = struct.Struct("<HII")
+GRADE = struct.Struct("<BxH")
+
+'''
+Packs puzzles into the bank layout
+
+Parameters:
+row_length is the number of rows/columns of every puzzle
+entries is a list of (difficulty, puzzle, solution, rating) where puzzle and solution are
+PackedBoards and rating is a grader.Rating
+
+Return: bytes
+'''
+def pack_bank(row_length, entries):
+    groups = {}
+    for entry in entries:
+        if entry[1].row_length != row_length or entry[2].row_length != row_length:
+            raise ValueError("every puzzle in a bank must be %dx%d" % (row_length, row_length))
+        groups.setdefault(entry[0], []).append(entry)
+    header = HEADER.pack(MAGIC, VERSION, row_length, len(entries), len(groups))
+    index = []
+    records = []
+    for difficulty in sorted(groups):
+        index.append(INDEX_ENTRY.pack(difficulty, len(records), len(groups[difficulty])))
+        for difficulty, puzzle, solution, rating in groups[difficulty]:
+            records.append(puzzle.cells + solution.cells + GRADE.pack(rating.level, min(rating.score, 0xFFFF)))
+    return b"".join([header] + index + records)
+
+'''
+Writes a bank file, replacing an old one only once the new one is complete
+
+Parameters:
+path is the file to write
+row_length and entries are passed on to pack_bank
+
+Return: None
+'''
+def write_bank(path, row_length, entries):
+    write_atomic(path, pack_bank(row_length, entries))
+
+class PuzzleBank():
+    '''
+	A read-only, memory mapped puzzle bank
+    It has get_puzzle like PuzzlePool, so it can be given to Board as the pool
+    This should initialize:
+    self.row_length     - the number of rows/columns of the puzzles
+    self.count          - the total number of puzzles
+    self.ranges         - difficulty -> (offset of its first record, number of records)
+    self.record_size    - the size of one record in bytes
+    self.map            - the read-only mmap of the file
+    self.rng            - the random.Random get_puzzle picks puzzles with
+
+	Parameters:
+    path is the bank file
+    seed is an optional seed for the puzzles get_puzzle picks
+
+	Return: None
+    '''
+    def __init__(self, path, seed=None):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self.map) < HEADER.size:
+                raise ValueError("bank is too short")
+            magic, version, self.row_length, self.count, difficulties = HEADER.unpack_from(self.map)
+            if magic != MAGIC:
+                raise ValueError("not a puzzle bank")
+            if version != VERSION:
+                raise ValueError("unsupported bank version %d" % version)
+            cells = self.row_length * self.row_length
+            self.record_size = cells * 2 + GRADE.size
+            start = HEADER.size + INDEX_ENTRY.size * difficulties
+            if len(self.map) != start + self.record_size * self.count:
+                raise ValueError("bank size doesn't match its header")
+            self.ranges = {}
+            for k in range(difficulties):
+                difficulty, first, count = INDEX_ENTRY.unpack_from(self.map, HEADER.size + INDEX_ENTRY.size * k)
+                if first + count > self.count:
+                    raise ValueError("bank index is past its records")
+                self.ranges[difficulty] = (start + first * self.record_size, count)
+        except (ValueError, struct.error):
+            self.map.close()
+            raise
+        self.rng = random.Random(seed)
+
+    '''
+	Returns the difficulties the bank has puzzles for
+
+	Parameters: None
+	Return: list[int]
+    '''
+    def difficulties(self):
+        return sorted(self.ranges)
+
+    '''
+	Returns the number of puzzles of a difficulty
+
+	Parameters:
+    difficulty is the number of removed cells
+	Return: int
+    '''
+    def size(self, difficulty):
+        return self.ranges.get(difficulty, (0, 0))[1]
+
+    '''
+	Reads puzzle k of a difficulty
+    Raises IndexError if there is no such puzzle
+
+	Parameters:
+    difficulty is the number of removed cells
+    k is the index of the puzzle within the difficulty
+	Return: tuple(PackedBoard, PackedBoard, int, int) (the puzzle, its solution, grade level, and grade score)
+    '''
+    def get(self, difficulty, k):
+        offset, count = self.ranges.get(difficulty, (0, 0))
+        if not 0 <= k < count:
+            raise IndexError("no puzzle %d with difficulty %d" % (k, difficulty))
+        offset += k * self.record_size
+        cells = self.row_length * self.row_length
+        puzzle = PackedBoard(self.map[offset:offset + cells])
+        solution = PackedBoard(self.map[offset + cells:offset + cells * 2])
+        level, score = GRADE.unpack_from(self.map, offset + cells * 2)
+        return puzzle, solution, level, score
+
+    '''
+	Picks a random puzzle of a difficulty, like PuzzlePool.get_puzzle
+    Raises IndexError if the bank has no puzzles of the difficulty
+
+	Parameters:
+    difficulty is the number of removed cells
+	Return: tuple(PackedBoard, PackedBoard) (the puzzle and its solution)
+    '''
+    def get_puzzle(self, difficulty):
+        count = self.size(difficulty)
+        if count == 0:
+            raise IndexError("no puzzles with difficulty %d" % difficulty)
+        puzzle, solution, level, score = self.get(difficulty, self.rng.randrange(count))
+        return puzzle, solution
+
+    '''
+	Unmaps the file, puzzles already read stay valid
+
+	Parameters: None
+	Return: None
+    '''
+    def close(self):
+        self.map.close()
+
+    def __len__(self):
+        return self.count
+
+'''
+Reads the output of generate_puzzles.py, solving and grading every puzzle
+Puzzles that don't have exactly one solution are skipped
+
+Parameters:
+lines is an iterable of "<puzzle> <difficulty name>" lines
+
+Return: tuple(int, list) (the row length, and the entries for pack_bank)
+'''
+def read_puzzles(lines):
+    row_length = None
+    entries = []
+    for line in lines:
+        if not line.strip():
+            continue
+        text, name = line.split()
+        puzzle = PackedBoard.from_string(text)
+        if row_length is None:
+            row_length = puzzle.row_length
+        elif puzzle.row_length != row_length:
+            raise ValueError("puzzles of different sizes (%d and %d)" % (row_length, puzzle.row_length))
+        solutions = solve(puzzle, 2)
+        if len(solutions) != 1:
+            continue
+        difficulty = scale_difficulty(DIFFICULTIES[name], row_length)
+        entries.append((difficulty, puzzle, PackedBoard.from_grid(solutions[0]), grader.grade(puzzle)))
+    return row_length or ROW_LENGTH, entries
+
+'''
+Command line entry point
+
+Parameters:
+argv is the list of command line arguments (defaults to sys.argv[1:])
+
+Return: None
+'''
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory mapped puzzle bank from generate_puzzles.py output.")
+    parser.add_argument("input", help="puzzles file written by generate_puzzles.py (- for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="bank file to write")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    try:
+        row_length, entries = read_puzzles(source)
+    except (ValueError, KeyError) as e:
+        parser.error("bad puzzles file: %s" % e)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    write_bank(args.output, row_length, entries)
+    counts = {}
+    for entry in entries:
+        counts[entry[0]] = counts.get(entry[0], 0) + 1
+    print("wrote %d puzzles (%s)" % (len(entries), ", ".join("%d removed: %d" % item for item in sorted(counts.items()))), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
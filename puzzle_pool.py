@@ -0,0 +1,183 @@
+import random
+import threading
+from collections import deque
+from sudoku_generator import generate_puzzle
+from canonical import canonical_form
+
+class PuzzlePool():
+    '''
+	Keeps ready-made puzzles for each difficulty so boards don't have to be generated on click
+    A daemon thread refills every difficulty back up to capacity in the background
+    This should initialize:
+    self.row_length     - the number of rows/columns of the puzzles
+    self.capacity       - the number of ready puzzles to keep per difficulty
+    self.unique         - whether puzzles must have exactly one solution
+    self.puzzles        - a dict of difficulty -> deque of (puzzle, solution) PackedBoards
+    self.hits           - the number of get calls served from the pool
+    self.misses         - the number of get calls that had to generate inline
+    self.running        - boolean controlling the refill thread
+    self.thread         - the refill thread, None until start is called
+    self.index          - optional CanonicalIndex used to reject puzzles equivalent to earlier ones
+    self.pattern        - the shape of the removed cells, passed on to generate_sudoku
+    self.rng            - the random.Random every puzzle seed is drawn from
+
+	Parameters:
+    difficulties is a list of difficulties (number of cells to remove) to keep puzzles for
+    capacity is the number of ready puzzles to keep per difficulty
+    row_length is the number of rows/columns of the puzzles
+    unique is passed on to generate_sudoku
+    index is an optional CanonicalIndex, every puzzle the pool generates is added to it and
+    puzzles already in it are thrown away and regenerated
+    seed is an optional int, the same seed gives the same puzzles in the same order per difficulty
+    as long as only one thread generates (no misses in get)
+    pattern is the shape of the removed cells (see sudoku_generator.PATTERNS)
+
+	Return: None
+    '''
+    def __init__(self, difficulties, capacity=3, row_length=9, unique=True, index=None, seed=None, pattern="random"):
+        self.row_length = row_length
+        self.capacity = capacity
+        self.unique = unique
+        self.puzzles = {difficulty: deque() for difficulty in difficulties}
+        self.hits = 0
+        self.misses = 0
+        self.running = False
+        self.thread = None
+        self.index = index
+        self.pattern = pattern
+        self.rng = random.Random(seed)
+        # guards the deques and counters, and wakes the refill thread when a puzzle is taken
+        self.condition = threading.Condition()
+
+    '''
+	Starts the background refill thread
+
+	Parameters: None
+	Return: None
+    '''
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.refill, name="PuzzlePool", daemon=True)
+            self.thread.start()
+
+    '''
+	Stops the background refill thread
+    A puzzle being generated is finished first, so this can block for one generation
+
+	Parameters:
+    wait is whether to wait for the thread to finish, pass False when the program is about
+    to exit anyway (the thread is a daemon, so it does not keep the program alive)
+	Return: None
+    '''
+    def stop(self, wait=True):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            if wait:
+                self.thread.join()
+            self.thread = None
+
+    '''
+	Refill thread body - generates puzzles for the emptiest difficulty until every
+    difficulty is at capacity, then sleeps until a puzzle is taken
+
+	Parameters: None
+	Return: None
+    '''
+    def refill(self):
+        while True:
+            with self.condition:
+                while self.running and self.is_full():
+                    self.condition.wait()
+                if not self.running:
+                    return
+                difficulty = min(self.puzzles, key=lambda d: len(self.puzzles[d]))
+            # generated outside the lock so get never waits on a generation
+            puzzle = self.generate(difficulty)
+            with self.condition:
+                self.puzzles[difficulty].append(puzzle)
+
+    '''
+	Generates a puzzle, retrying while it is equivalent to one in the index
+    Each puzzle gets its own seed, so the refill thread and get never share random state
+
+	Parameters:
+    difficulty is the number of cells to remove
+
+	Return: tuple(PackedBoard, PackedBoard) (the puzzle and its solution)
+    '''
+    def generate(self, difficulty):
+        while True:
+            with self.condition:
+                seed = self.rng.getrandbits(64)
+            puzzle, solution = generate_puzzle(self.row_length, difficulty, self.unique, seed=seed, pattern=self.pattern)
+            if self.index is None:
+                return puzzle, solution
+            form = canonical_form(puzzle)
+            with self.condition:
+                if self.index.add(puzzle, form):
+                    return puzzle, solution
+
+    '''
+	Determines if every difficulty has capacity puzzles ready
+
+	Parameters: None
+	Return: boolean
+    '''
+    def is_full(self):
+        for puzzles in self.puzzles.values():
+            if len(puzzles) < self.capacity:
+                return False
+        return True
+
+    '''
+	Takes a puzzle from the pool, generating one inline if none are ready
+
+	Parameters:
+    difficulty is the number of cells to remove
+
+	Return: list[list] (a 2D Python list to represent the board)
+    '''
+    def get(self, difficulty):
+        return self.get_puzzle(difficulty)[0].to_grid()
+
+    '''
+	Takes a puzzle and its solution from the pool, generating them inline if none are ready
+    Difficulties the pool wasn't made with are always generated inline, they are never
+    added to the difficulties the refill thread keeps ready
+
+	Parameters:
+    difficulty is the number of cells to remove
+
+	Return: tuple(PackedBoard, PackedBoard) (the puzzle and its solution)
+    '''
+    def get_puzzle(self, difficulty):
+        with self.condition:
+            puzzles = self.puzzles.get(difficulty)
+            if puzzles:
+                self.hits += 1
+                puzzle = puzzles.popleft()
+            else:
+                self.misses += 1
+                puzzle = None
+            self.condition.notify()
+        if puzzle is None:
+            puzzle = self.generate(difficulty)
+        return puzzle
+
+    '''
+	Returns the pool counters, useful for sizing capacity
+
+	Parameters: None
+	Return: dict
+    '''
+    def stats(self):
+        with self.condition:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "duplicates": self.index.duplicates if self.index is not None else 0,
+                "ready": {difficulty: len(puzzles) for difficulty, puzzles in self.puzzles.items()},
+            }
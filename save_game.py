@@ -0,0 +1,251 @@
+import os
+import struct
+import threading
+from collections import namedtuple
+
+"""
+Saves and loads a game in progress as a small fixed-size binary file
+Layout (little endian), where n is the row length and cells = n * n:
+    header      magic "SDKU", version (u16), n (u8), flags (u8, bit 0 set if the solution
+                is stored), selected row and col (u8 each, 255 for none), elapsed seconds
+                (f64), difficulty (u16)
+    puzzle      cells bytes, the givens, 0 for empty
+    givens      (cells + 7) // 8 bytes, bit k set if cell k is a given
+    values      cells bytes, the current values (givens included), 0 for empty
+    sketches    cells bytes, 0 for none
+    notes       cells u32, the pencil mark bitmasks
+    solution    cells bytes, all 0 if not stored
+Everything is read back with one read, and loading never generates a puzzle (or solves
+one, since the solution is stored whenever the board knows it)
+Files are written to a temporary file and renamed over the old one, so a crash while
+saving leaves the previous save intact
+
+"""
+
+MAGIC = b"SDKU"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBBBdH")
+# selected row/col stored when no cell is selected
+NO_SELECTION = 255
+# handed to Autosaver.save to delete the save instead of writing one
+DELETE = b""
+
+SavedGame = namedtuple("SavedGame", ["row_length", "difficulty", "puzzle", "solution", "values",
+                                     "sketches", "notes", "selected", "elapsed"])
+
+'''
+Returns the size of a save file for a board size
+
+Parameters:
+row_length is the number of rows/columns of the board
+
+Return: int (bytes)
+'''
+def save_size(row_length):
+    cells = row_length * row_length
+    return HEADER.size + cells * 8 + (cells + 7) // 8
+
+'''
+Packs the state of a board into the save layout
+
+Parameters:
+board is a BoardState (or Board)
+elapsed is the number of seconds played so far
+
+Return: bytes
+'''
+def pack_game(board, elapsed):
+    n = board.row_length
+    cells = n * n
+    flags = 1 if board.solution is not None else 0
+    row, col = board.selected if board.selected is not None else (NO_SELECTION, NO_SELECTION)
+    puzzle = bytes(num for line in board.orig_board for num in line)
+    givens = bytearray((cells + 7) // 8)
+    for k in range(cells):
+        if puzzle[k]:
+            givens[k >> 3] |= 1 << (k & 7)
+    values = bytes(num for line in board.board for num in line)
+    sketches = bytes(num for line in board.sketches for num in line)
+    notes = struct.pack("<%dI" % cells, *board.notes)
+    if board.solution is not None:
+        solution = bytes(num for line in board.solution for num in line)
+    else:
+        solution = bytes(cells)
+    header = HEADER.pack(MAGIC, VERSION, n, flags, row, col, elapsed, board.difficulty)
+    return b"".join((header, puzzle, givens, values, sketches, notes, solution))
+
+'''
+Unpacks a save made by pack_game
+Raises ValueError if data is not a save this version can read
+
+Parameters:
+data is the bytes of the save
+
+Return: SavedGame (boards are 2D lists, solution is None if it was not stored)
+'''
+def unpack_game(data):
+    if len(data) < HEADER.size:
+        raise ValueError("save is too short")
+    magic, version, n, flags, row, col, elapsed, difficulty = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a sudoku save")
+    if version != VERSION:
+        raise ValueError("unsupported save version %d" % version)
+    if len(data) != save_size(n):
+        raise ValueError("save should be %d bytes for a %dx%d board, got %d" % (save_size(n), n, n, len(data)))
+    cells = n * n
+    offset = HEADER.size
+    puzzle = data[offset:offset + cells]
+    offset += cells
+    givens = data[offset:offset + (cells + 7) // 8]
+    offset += (cells + 7) // 8
+    values = data[offset:offset + cells]
+    offset += cells
+    sketches = data[offset:offset + cells]
+    offset += cells
+    notes = list(struct.unpack_from("<%dI" % cells, data, offset))
+    offset += cells * 4
+    solution = data[offset:offset + cells]
+    for k in range(cells):
+        if bool(puzzle[k]) != bool(givens[k >> 3] >> (k & 7) & 1) or (puzzle[k] and values[k] != puzzle[k]):
+            raise ValueError("save givens don't match its puzzle")
+    if max(puzzle + values + sketches + solution, default=0) > n:
+        raise ValueError("save has values past %d" % n)
+
+    grid = lambda cells: [list(cells[r * n:(r + 1) * n]) for r in range(n)]
+    selected = (row, col) if row != NO_SELECTION and row < n and col < n else None
+    return SavedGame(n, difficulty, grid(puzzle), grid(solution) if flags & 1 else None, grid(values),
+                     grid(sketches), notes, selected, elapsed)
+
+'''
+Writes data to path, replacing the old file only once the new one is complete
+
+Parameters:
+path is the file to write
+data is the bytes to write
+
+Return: None
+'''
+def write_atomic(path, data):
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+'''
+Saves a game in progress
+
+Parameters:
+path is the file to write
+board is a BoardState (or Board)
+elapsed is the number of seconds played so far
+
+Return: None
+'''
+def save_game(path, board, elapsed):
+    write_atomic(path, pack_game(board, elapsed))
+
+'''
+Loads a saved game with a single read
+Raises OSError if the file can't be read and ValueError if it is not a valid save
+
+Parameters:
+path is the file to read
+
+Return: SavedGame
+'''
+def load_game(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return unpack_game(data)
+
+class Autosaver():
+    '''
+	Writes saves on a background thread so the game loop never waits on the disk
+    The game packs the state itself (a snapshot that can't change while it is written) and
+    hands the bytes over, only the newest save waiting to be written is kept
+    This should initialize:
+    self.path           - the file saves are written to
+    self.pending        - the bytes of the next save to write, None if there is none
+    self.running        - boolean controlling the writer thread
+    self.thread         - the writer thread, None until start is called
+    self.errors         - the number of saves that could not be written
+
+	Parameters:
+    path is the file saves are written to
+
+	Return: None
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.running = False
+        self.thread = None
+        self.errors = 0
+        # guards pending, and wakes the writer thread when a save is handed over
+        self.condition = threading.Condition()
+
+    '''
+	Starts the background writer thread
+
+	Parameters: None
+	Return: None
+    '''
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.write, name="Autosaver", daemon=True)
+            self.thread.start()
+
+    '''
+	Hands a save over to the writer thread, replacing any save not written yet
+
+	Parameters:
+    data is the bytes of the save (see pack_game), or DELETE to remove the save file
+	Return: None
+    '''
+    def save(self, data):
+        with self.condition:
+            self.pending = data
+            self.condition.notify()
+
+    '''
+	Stops the writer thread after it writes the save still waiting, if any
+
+	Parameters: None
+	Return: None
+    '''
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    '''
+	Writer thread body - writes each save handed over until stopped
+
+	Parameters: None
+	Return: None
+    '''
+    def write(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                data = self.pending
+                self.pending = None
+                if data is None:
+                    return
+            try:
+                if data == DELETE:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                else:
+                    write_atomic(self.path, data)
+            except OSError:
+                # the game keeps going, the next autosave tries again
+                self.errors += 1
@@ -0,0 +1,306 @@
+import math
+from constraints import Constraints
+from packed_board import PackedBoard
+from lookup_tables import get_tables
+
+"""
+Exact cover sudoku solver using the row, column, and box bitmasks from constraints.py
+Every constraint (cell filled, digit in row, digit in col, digit in box) must be covered exactly once.
+Constraints with a single option left are covered right away (naked and hidden singles),
+then the search branches on the empty cell with the fewest candidates (MRV)
+Every cell keeps a candidate bitmask that is updated through precomputed peer lists as values
+are placed, so a step costs about the number of peers instead of a scan of the board.
+This keeps 16x16 and 25x25 boards practical
+
+"""
+
+class Solver():
+    '''
+	Creates a solver for one puzzle
+    This should initialize:
+    self.row_length     - the length of each row
+    self.cells          - a flat list of the row_length**2 values, 0 for empty
+    self.constraints    - the row, column, and box bitmasks of the puzzle
+    self.valid          - False if the givens already break a constraint
+    self.solutions      - the solutions found by the last call to solve
+    self.tables         - the lookup tables of the board size (see lookup_tables.py)
+
+	Parameters:
+    board is a 2D list of ints (like Board.board), a PackedBoard, or a string of
+    row_length**2 characters where '0' or '.' marks an empty cell
+    constraints is an optional Constraints already matching board (e.g. SudokuGenerator.constraints)
+    passing it skips rebuilding and checking the masks from the givens
+
+	Return: None
+    '''
+    def __init__(self, board, constraints=None):
+        self.cells = parse_board(board)
+        self.row_length = math.isqrt(len(self.cells))
+        n = self.row_length
+        self.tables = get_tables(n)
+        self.units, self.peers = self.tables.units, self.tables.peers
+        self.valid = True
+        self.solutions = []
+        if constraints is not None:
+            self.constraints = constraints.copy()
+        else:
+            self.constraints = Constraints(n)
+            row_of, col_of = self.tables.row_of, self.tables.col_of
+            for i in range(n * n):
+                num = self.cells[i]
+                if num == 0:
+                    continue
+                if self.constraints.is_valid(row_of[i], col_of[i], num):
+                    self.constraints.place(row_of[i], col_of[i], num)
+                else:
+                    # a given repeats in a row, col, or box so there is no solution
+                    self.valid = False
+
+    '''
+	Builds the candidate bitmask of every cell and places the cells that are already forced
+
+	Parameters:
+    cells is the flat list of values, 0 for empty (changed in place)
+
+	Return: list[int] or None (the candidates, 0 for filled cells, None if some cell has none)
+    '''
+    def start(self, cells):
+        c = self.constraints
+        row_of, col_of = self.tables.row_of, self.tables.col_of
+        cand = [0] * len(cells)
+        singles = []
+        for i in range(len(cells)):
+            if cells[i] == 0:
+                mask = c.candidates(row_of[i], col_of[i])
+                if mask == 0:
+                    return None
+                cand[i] = mask
+                if mask & (mask - 1) == 0:
+                    singles.append(i)
+        for i in singles:
+            if cells[i] == 0 and not self.assign(cells, cand, i, cand[i]):
+                return None
+        return cand
+
+    '''
+	Finds up to limit solutions of the puzzle
+
+	Parameters:
+    limit is the number of solutions to stop at
+
+	Return: list[list[list]] (each solution is a 2D Python list like Board.board)
+    '''
+    def solve(self, limit=1):
+        self.solutions = []
+        self.limit = limit
+        self.nodes = 0
+        self.budget = math.inf
+        if self.valid:
+            cells = self.cells[:]
+            cand = self.start(cells)
+            if cand is not None:
+                self.search(cells, cand)
+        return [to_grid(cells, self.row_length) for cells in self.solutions]
+
+    '''
+	Determines if the puzzle has a solution where the empty cell (row, col) is not num
+    If num is known to be part of one solution, False means that solution is unique.
+    This only searches the other candidates of one cell, so it is much cheaper than
+    counting solutions up to 2
+    On big, sparse boards a single probe can take seconds, so a budget can be given.
+    When the search needs more nodes than that it stops and answers True, which is the
+    safe answer for a generator that only removes cells when this is False
+
+	Parameters:
+    row and col are the row index and col index of an empty cell
+    num is the value to exclude from the cell
+    budget is an optional number of search nodes to give up after
+
+	Return: boolean
+    '''
+    def has_other_solution(self, row, col, num, budget=None):
+        if not self.valid:
+            return False
+        self.solutions = []
+        self.limit = 1
+        self.nodes = 0
+        self.budget = budget if budget is not None else math.inf
+        i = row * self.row_length + col
+        mask = self.constraints.candidates(row, col) & ~(1 << num)
+        if mask == 0:
+            return False
+        cells = self.cells[:]
+        cand = self.start(cells)
+        if cand is None:
+            return False
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            next_cells = cells[:]
+            next_cand = cand[:]
+            if self.assign(next_cells, next_cand, i, bit) and self.search(next_cells, next_cand):
+                return True
+        return False
+
+    '''
+	Places a value and removes it from the candidates of its peers, then places every
+    peer that is left with a single candidate the same way (naked singles)
+
+	Parameters:
+    cells and cand are the flat values and candidate bitmasks (changed in place)
+    i is the flat index of the cell
+    bit is the value to place as a bitmask
+
+	Return: boolean (False if some cell was left with no candidates)
+    '''
+    def assign(self, cells, cand, i, bit):
+        peers = self.peers
+        stack = [(i, bit)]
+        while stack:
+            i, bit = stack.pop()
+            if cells[i] != 0:
+                # a single can be queued by more than one peer
+                if 1 << cells[i] != bit:
+                    return False
+                continue
+            if not cand[i] & bit:
+                return False
+            cells[i] = bit.bit_length() - 1
+            cand[i] = 0
+            for p in peers[i]:
+                mask = cand[p]
+                if mask & bit:
+                    mask ^= bit
+                    cand[p] = mask
+                    if mask == 0:
+                        return False
+                    if mask & (mask - 1) == 0:
+                        stack.append((p, mask))
+        return True
+
+    '''
+	Places hidden singles until there are none left, then branches on the empty cell
+    with the fewest candidates and recurses on a copy of the state for each candidate
+    Naked singles are placed by assign as soon as they appear, a hidden single is the
+    only place in a row, col, or box where a digit can still go
+    Stops once self.limit solutions have been recorded, or after self.budget calls
+
+	Parameters:
+    cells is the flat list of values, 0 for empty (changed in place)
+    cand is the flat list of candidate bitmasks, 0 for filled cells (changed in place)
+
+	Return: boolean (whether the search should stop)
+    '''
+    def search(self, cells, cand):
+        self.nodes += 1
+        if self.nodes > self.budget:
+            return True
+
+        changed = True
+        while changed:
+            changed = False
+            # once holds digits that fit in at least one cell of the unit and twice in at least two
+            for unit in self.units:
+                once = 0
+                twice = 0
+                empty = 0
+                for i in unit:
+                    mask = cand[i]
+                    if mask:
+                        twice |= once & mask
+                        once |= mask
+                        empty += 1
+                # placed digits are never candidates, so fewer candidate digits than empty
+                # cells means some missing digit has nowhere to go in this unit
+                if once.bit_count() < empty:
+                    return False
+                hidden = once & ~twice
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    # a digit whose cell was just taken by another single has no cell left,
+                    # which the next pass catches
+                    for i in unit:
+                        if cand[i] & bit:
+                            if not self.assign(cells, cand, i, bit):
+                                return False
+                            changed = True
+                            break
+
+        # MRV: branch on the empty cell with the fewest candidates
+        best = -1
+        best_count = self.row_length + 1
+        for i in range(len(cells)):
+            if cand[i]:
+                count = cand[i].bit_count()
+                if count < best_count:
+                    best = i
+                    best_count = count
+                    if count == 2:
+                        break
+        if best == -1:
+            self.solutions.append(cells)
+            return len(self.solutions) >= self.limit
+
+        mask = cand[best]
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            next_cells = cells[:]
+            next_cand = cand[:]
+            if self.assign(next_cells, next_cand, best, bit) and self.search(next_cells, next_cand):
+                return True
+        return False
+
+'''
+Converts a 2D list, a PackedBoard, or a string into a flat list of ints
+
+Parameters:
+board is a 2D list of ints, a PackedBoard, or a string where '0' or '.' marks an empty cell
+(or comma separated values, see PackedBoard.from_string)
+
+Return: list[int]
+'''
+def parse_board(board):
+    if isinstance(board, PackedBoard):
+        return list(board.cells)
+    if isinstance(board, str):
+        return list(PackedBoard.from_string(board).cells)
+    return [num for row in board for num in row]
+
+'''
+Converts a flat list of ints into a 2D list
+
+Parameters:
+cells is the flat list of values
+row_length is the number of rows/columns of the board
+
+Return: list[list]
+'''
+def to_grid(cells, row_length):
+    return [list(cells[i:i + row_length]) for i in range(0, row_length * row_length, row_length)]
+
+'''
+Finds up to limit solutions of a puzzle
+
+Parameters:
+board is a 2D list of ints, a PackedBoard, or a string of row_length**2 characters
+limit is the number of solutions to stop at
+
+Return: list[list[list]] (each solution is a 2D Python list)
+'''
+def solve(board, limit=1):
+    return Solver(board).solve(limit)
+
+'''
+Counts the solutions of a puzzle, stopping at limit
+count_solutions(board, 2) == 1 means the puzzle has exactly one solution
+
+Parameters:
+board is a 2D list of ints, a PackedBoard, or a string of row_length**2 characters
+limit is the number of solutions to stop at
+
+Return: int
+'''
+def count_solutions(board, limit=2):
+    return len(Solver(board).solve(limit))
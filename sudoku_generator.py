@@ -1,5 +1,18 @@
 import math
 import random
+from constraints import Constraints, mask_to_digits
+from solver import Solver
+from lookup_tables import get_tables
+from packed_board import PackedBoard
+from constants import ROW_LENGTH
+import grader
+
+# search nodes a uniqueness probe may use before the cell is kept as a given,
+# which bounds the time of a probe on 16x16 and larger boards
+PROBE_BUDGET = 30
+# boards up to this size always run probes to the end and try every group, the budget
+# and early stop only pay off on bigger boards
+FULL_SEARCH_LENGTH = 9
 
 """
 This was adapted from a GeeksforGeeks article "Program for Sudoku Generator" by Aarti_Rathi and Ankur Trisal
@@ -15,21 +28,40 @@ class SudokuGenerator:
 	self.removed_cells	- the total number of cells to be removed
 	self.board			- a 2D list of ints to represent the board
 	self.box_length		- the square root of row_length
+	self.constraints	- the row, column, and box bitmasks of the board
+	self.unique			- whether remove_cells must keep exactly one solution
+	self.rng			- the random number generator every random choice is drawn from
+	self.pattern		- the name of the removal pattern (a key of PATTERNS)
+	self.solution		- the filled board as a PackedBoard, None until fill_values is called
 
 	Parameters:
-    row_length is the number of rows/columns of the board (always 9 for this project)
+    row_length is the number of rows/columns of the board (9, 16, 25, ... any perfect square)
     removed_cells is an integer value - the number of cells to be removed
+    unique is whether removed cells must leave a puzzle with only one solution
+    rng is an optional random.Random, the same seed then always gives the same board
+    (defaults to the shared random module)
+    pattern is the shape the removed cells take, "random", "symmetric" (mirrored left to right),
+    "rotational" (the same after turning the board half way), or "clustered" (box by box)
 
 	Return:
 	None
     '''
-    def __init__(self, row_length, removed_cells):
+    def __init__(self, row_length, removed_cells, unique=False, rng=None, pattern="random"):
+        if not 0 <= removed_cells <= row_length * row_length:
+            raise ValueError("removed_cells must be between 0 and %d, got %d" % (row_length * row_length, removed_cells))
+        if pattern not in PATTERNS:
+            raise ValueError("unknown removal pattern '%s', expected one of %s" % (pattern, ", ".join(PATTERNS)))
         self.row_length = row_length
         self.removed_cells = removed_cells
         # 2d list comprehension filling board with zeros
         self.board = [[0 for i in range(row_length)] for j in range(row_length)]
         # sqrt returns a float, needs to be an int
         self.box_length = int(math.sqrt(row_length))
+        self.constraints = Constraints(row_length)
+        self.unique = unique
+        self.rng = rng if rng is not None else random
+        self.pattern = pattern
+        self.solution = None
 
     '''
 	Returns a 2D python list of numbers which represents the board
@@ -40,6 +72,24 @@ class SudokuGenerator:
     def get_board(self):
         return self.board
 
+    '''
+	Returns a compact, immutable copy of the board
+
+	Parameters: None
+	Return: PackedBoard
+    '''
+    def get_packed_board(self):
+        return PackedBoard.from_grid(self.board)
+
+    '''
+	Returns the filled board saved by fill_values, which remove_cells doesn't touch
+
+	Parameters: None
+	Return: PackedBoard or None (if fill_values wasn't called yet)
+    '''
+    def get_solution(self):
+        return self.solution
+
     '''
 	Displays the board to the console
     This is not strictly required, but it may be useful for debugging purposes
@@ -64,10 +114,7 @@ class SudokuGenerator:
 	Return: boolean
     '''
     def valid_in_row(self, row, num):
-        for i in self.board[row]:
-            if i == num:
-                return False
-        return True
+        return not self.constraints.rows[row] >> num & 1
 
     '''
 	Determines if num is contained in the specified column (vertical) of the board
@@ -80,10 +127,7 @@ class SudokuGenerator:
 	Return: boolean
     '''
     def valid_in_col(self, col, num):
-        for i in self.board:
-            if i[col] == num:
-                return False
-        return True
+        return not self.constraints.cols[col] >> num & 1
 
     '''
 	Determines if num is contained in the 3x3 box specified on the board
@@ -98,11 +142,7 @@ class SudokuGenerator:
 	Return: boolean
     '''
     def valid_in_box(self, row_start, col_start, num):
-        for i in range(row_start, row_start+3):
-            for j in range(col_start, col_start+3):
-                if num == self.board[i][j]:
-                    return False
-        return True
+        return not self.constraints.boxes[self.constraints.box_of[row_start][col_start]] >> num & 1
 
     '''
     Determines if it is valid to enter num at (row, col) in the board
@@ -115,39 +155,65 @@ class SudokuGenerator:
 	Return: boolean
     '''
     def is_valid(self, row, col, num):
-        # number is valid if it is valid in the row, col, and box
-        return self.valid_in_row(row, num) and self.valid_in_col(col, num) and self.valid_in_box(row//3*3, col//3*3, num)
+        # number is valid if it is unused in the row, col, and box masks
+        return self.constraints.is_valid(row, col, num)
+
+    '''
+    Places num at (row, col) and marks it as used in the constraint masks
+    All writes of a nonzero value to the board should go through here
+
+	Parameters:
+	row and col are the row index and col index of the cell
+	num is the value to place
+
+	Return: None
+    '''
+    def place(self, row, col, num):
+        self.board[row][col] = num
+        self.constraints.place(row, col, num)
+
+    '''
+    Clears (row, col) and marks its value as unused in the constraint masks
+
+	Parameters:
+	row and col are the row index and col index of the cell
 
+	Return: None
     '''
-    Fills the specified 3x3 box with values
+    def unplace(self, row, col):
+        self.constraints.remove(row, col, self.board[row][col])
+        self.board[row][col] = 0
+
+    '''
+    Fills the specified box with values
     For each position, generates a random digit which has not yet been used in the box
 
 	Parameters:
 	row_start and col_start are the starting indices of the box to check
-	i.e. the box is from (row_start, col_start) to (row_start+2, col_start+2)
+	i.e. the box is from (row_start, col_start) to (row_start+box_length-1, col_start+box_length-1)
 
 	Return: None
     '''
     def fill_box(self, row_start, col_start):
-        # creates a list 1-9, places random num in box, pops from list
+        # creates a list 1-row_length, places random num in box, pops from list
         nums = [i for i in range(1, self.row_length + 1)]
-        for i in range(row_start, row_start+3):
-            for j in range(col_start, col_start+3):
-                random_index = random.randint(0, len(nums) - 1)
-                self.board[i][j] = nums[random_index]
+        for i in range(row_start, row_start+self.box_length):
+            for j in range(col_start, col_start+self.box_length):
+                random_index = self.rng.randint(0, len(nums) - 1)
+                self.place(i, j, nums[random_index])
                 nums.pop(random_index)
 
         '''
-    Fills the three boxes along the main diagonal of the board
-    These are the boxes which start at (0,0), (3,3), and (6,6)
+    Fills the boxes along the main diagonal of the board
+    These are the boxes which start at (0,0), (box_length,box_length), ... e.g. (0,0), (3,3), and (6,6) for 9x9
 
 	Parameters: None
 	Return: None
     '''
     def fill_diagonal(self):
-        self.fill_box(0, 0)
-        self.fill_box(3, 3)
-        self.fill_box(6, 6)
+        # diagonal boxes share no row, col, or box, so each can be filled on its own
+        for k in range(0, self.row_length, self.box_length):
+            self.fill_box(k, k)
 
     '''
     DO NOT CHANGE
@@ -180,25 +246,45 @@ class SudokuGenerator:
                 if row >= self.row_length:
                     return True
 
-        for num in range(1, self.row_length + 1):
-            if self.is_valid(row, col, num):
-                self.board[row][col] = num
-                if self.fill_remaining(row, col + 1):
-                    return True
-                self.board[row][col] = 0
+        # only digits unused by the row, col, and box are tried, in ascending order
+        for num in mask_to_digits(self.constraints.candidates(row, col)):
+            self.place(row, col, num)
+            if self.fill_remaining(row, col + 1):
+                return True
+            self.unplace(row, col)
         return False
 
     '''
     DO NOT CHANGE
     Provided for students
     Constructs a solution by calling fill_diagonal and fill_remaining
+    Past 9x9 the plain backtracking of fill_remaining takes far too long, so the rest of
+    the board is filled by the propagating search in solver.py instead
+    On 4x4 boards some diagonal fills can't be completed, those are cleared and redrawn
+    The filled board is kept in self.solution, since remove_cells changes self.board
 
 	Parameters: None
 	Return: None
     '''
     def fill_values(self):
-        self.fill_diagonal()
-        self.fill_remaining(0, self.box_length)
+        while True:
+            self.fill_diagonal()
+            if self.row_length <= 9:
+                if self.fill_remaining(0, self.box_length):
+                    break
+            else:
+                solutions = Solver(self.board, self.constraints).solve()
+                if solutions:
+                    for i in range(self.row_length):
+                        for j in range(self.row_length):
+                            if self.board[i][j] == 0:
+                                self.place(i, j, solutions[0][i][j])
+                    break
+            for i in range(self.row_length):
+                for j in range(self.row_length):
+                    if self.board[i][j] != 0:
+                        self.unplace(i, j)
+        self.solution = self.get_packed_board()
 
     '''
     Removes the appropriate number of cells from the board
@@ -209,18 +295,189 @@ class SudokuGenerator:
     NOTE: Be careful not to 'remove' the same cell multiple times
     i.e. if a cell is already 0, it cannot be removed again
 
+    The cells are taken from a shuffled list of cell groups (see PATTERNS), so every
+    cell is looked at once and exactly removed_cells cells are removed. A group is
+    skipped when taking it would leave a count the remaining groups can't make up,
+    e.g. an odd count with only mirrored pairs left
+    Raises ValueError if the pattern can't make removed_cells at all (an odd count with a
+    symmetric or rotational pattern on an even sized board)
+
 	Parameters: None
 	Return: None
     '''
     def remove_cells(self):
-        for i in range(self.removed_cells):
-            row_rand = random.randint(0, self.row_length-1)
-            col_rand = random.randint(0, self.row_length-1)
+        if self.unique:
+            self.remove_cells_unique()
+            return
+        groups = self.removal_groups()
+        singles = sum(1 for group in groups if len(group) == 1)
+        pairs = len(groups) - singles
+        if not can_make(self.removed_cells, singles, pairs):
+            raise ValueError("the %s pattern can't remove exactly %d cells" % (self.pattern, self.removed_cells))
+        remaining = self.removed_cells
+        for group in groups:
+            if len(group) == 1:
+                singles -= 1
+            else:
+                pairs -= 1
+            if len(group) <= remaining and can_make(remaining - len(group), singles, pairs):
+                for row, col in group:
+                    self.unplace(row, col)
+                remaining -= len(group)
+
+    '''
+    Returns the groups of cells that are removed together, in the order they are tried
+
+	Parameters: None
+	Return: list[tuple] (each group is a tuple of (row, col), one or two cells)
+    '''
+    def removal_groups(self):
+        return PATTERNS[self.pattern](self.row_length, self.rng)
+
+    '''
+    Removes cells like remove_cells, but only keeps a removal if the puzzle still has
+    exactly one solution (the current filled board)
+    Each group of cells is tried once in pattern order, so fewer than removed_cells may be
+    removed if no more cells can be blanked without a second solution appearing
+    On boards bigger than FULL_SEARCH_LENGTH a probe that runs past PROBE_BUDGET search nodes
+    keeps the cell, and once row_length groups in a row had to be kept the board is close to
+    the fewest givens it can have, so the rest are not tried. On 25x25 boards those last
+    probes are most of the time
+
+    A removal of value v at (row, col) keeps the puzzle unique exactly when no solution
+    has anything other than v there, so each probe only searches the other candidates
+    of that cell, starting from the constraint masks that are kept up to date by unplace.
+    Any new solution after removing a group differs from the board in one of its cells,
+    so probing each cell of the group is enough
+
+	Parameters: None
+	Return: int (the number of cells actually removed)
+    '''
+    def remove_cells_unique(self):
+        removed = 0
+        kept = 0
+        if self.row_length > FULL_SEARCH_LENGTH:
+            budget, max_kept = PROBE_BUDGET, self.row_length
+        else:
+            budget, max_kept = None, math.inf
+        for group in self.removal_groups():
+            if removed >= self.removed_cells or kept >= max_kept:
+                break
+            if removed + len(group) > self.removed_cells:
+                continue
+            nums = [self.board[row][col] for row, col in group]
+            for row, col in group:
+                self.unplace(row, col)
+            for (row, col), num in zip(group, nums):
+                if Solver(self.board, self.constraints).has_other_solution(row, col, num, budget):
+                    # a second solution appeared, put the values back
+                    for (row, col), num in zip(group, nums):
+                        self.place(row, col, num)
+                    kept += 1
+                    break
+            else:
+                removed += len(group)
+                kept = 0
+        return removed
+
+'''
+Determines if exactly count cells can be removed using at most singles one-cell groups
+and pairs two-cell groups
+
+Parameters:
+count is the number of cells still to remove
+singles and pairs are the numbers of groups of each size left
+
+Return: boolean
+'''
+def can_make(count, singles, pairs):
+    # the number of singles used must have the parity of count and cover what pairs can't
+    low = max(count - 2 * pairs, count % 2)
+    return low <= min(singles, count)
+
+'''
+Removal pattern with every cell on its own, in random order
+
+Parameters:
+n is the number of rows/columns of the board
+rng is the random.Random (or random module) to shuffle with
+
+Return: list[tuple] (each group is a tuple of (row, col))
+'''
+def random_groups(n, rng):
+    positions = [(i, j) for i in range(n) for j in range(n)]
+    rng.shuffle(positions)
+    return [(position,) for position in positions]
+
+'''
+Removal pattern pairing each cell with its mirror across the middle column
+(cells in the middle column of an odd sized board are alone)
+
+Parameters: see random_groups
+Return: list[tuple]
+'''
+def symmetric_groups(n, rng):
+    groups = [((i, j), (i, n - 1 - j)) if j != n - 1 - j else ((i, j),) for i in range(n) for j in range((n + 1) // 2)]
+    rng.shuffle(groups)
+    return groups
 
-            while self.board[row_rand][col_rand] == 0:
-                row_rand = random.randint(0, self.row_length-1)
-                col_rand = random.randint(0, self.row_length-1)
-            self.board[row_rand][col_rand] = 0
+'''
+Removal pattern pairing each cell with the cell it lands on when the board is turned
+half way around (the center of an odd sized board is alone)
+
+Parameters: see random_groups
+Return: list[tuple]
+'''
+def rotational_groups(n, rng):
+    groups = []
+    for i in range(n):
+        for j in range(n):
+            other = (n - 1 - i, n - 1 - j)
+            if (i, j) < other:
+                groups.append(((i, j), other))
+            elif (i, j) == other:
+                groups.append(((i, j),))
+    rng.shuffle(groups)
+    return groups
+
+'''
+Removal pattern going through whole boxes in random order, with the cells of each box
+shuffled, so the removed cells bunch up in a few boxes
+
+Parameters: see random_groups
+Return: list[tuple]
+'''
+def clustered_groups(n, rng):
+    tables = get_tables(n)
+    boxes = list(range(n))
+    rng.shuffle(boxes)
+    groups = []
+    for b in boxes:
+        cells = [(tables.row_of[i], tables.col_of[i]) for i in tables.boxes[b]]
+        rng.shuffle(cells)
+        groups.extend((cell,) for cell in cells)
+    return groups
+
+# removal pattern name -> function returning the cell groups, see SudokuGenerator
+PATTERNS = {
+    "random": random_groups,
+    "symmetric": symmetric_groups,
+    "rotational": rotational_groups,
+    "clustered": clustered_groups,
+}
+
+'''
+Scales a difficulty given for 9x9 boards to another board size, so the same share of cells is removed
+Every tool that turns a difficulty name (see constants.DIFFICULTIES) into a cell count uses this
+
+Parameters:
+difficulty is the number of cells to remove from a 9x9 board
+row_length is the board size
+
+Return: int
+'''
+def scale_difficulty(difficulty, row_length):
+    return difficulty * row_length ** 2 // ROW_LENGTH ** 2
 
 '''
 DO NOT CHANGE
@@ -232,15 +489,48 @@ Given a number of rows and number of cells to remove, this function:
 4. returns the representative 2D Python Lists of the board and solution
 
 Parameters:
-size is the number of rows/columns of the board (9 for this project)
+size is the number of rows/columns of the board (9, 16, 25, ... any perfect square)
 removed is the number of cells to clear (set to 0)
+unique is whether the puzzle must have exactly one solution
+(at most removed cells are cleared in that case)
+grade is an optional level from grader.py (1 easy to 4 expert) the puzzle should have,
+puzzles are then always unique and are regenerated until one has that level
+max_attempts is the number of puzzles to try for a grade before returning the closest one
+seed is an optional int, the same (size, removed, unique, grade, seed) always gives the same
+puzzle, so a puzzle can be stored as its seed and regenerated when needed
+rng is an optional random.Random to draw from instead of seeding a new one
+pattern is the shape of the removed cells (see SudokuGenerator)
 
 Return: list[list] (a 2D Python list to represent the board)
 '''
-def generate_sudoku(size, removed):
-    sudoku = SudokuGenerator(size, removed)
+def generate_sudoku(size, removed, unique=False, grade=None, max_attempts=50, seed=None, rng=None, pattern="random"):
+    puzzle, solution = generate_puzzle(size, removed, unique, grade, max_attempts, seed, rng, pattern)
+    return puzzle.to_grid()
+
+'''
+Generates a puzzle like generate_sudoku, but also returns its solution
+Both are immutable, so they can be shared (e.g. by a PuzzlePool and the boards it hands out)
+without copying
+
+Parameters: the same as generate_sudoku
+
+Return: tuple(PackedBoard, PackedBoard) (the puzzle, with 0 for removed cells, and its solution)
+'''
+def generate_puzzle(size, removed, unique=False, grade=None, max_attempts=50, seed=None, rng=None, pattern="random"):
+    if rng is None and seed is not None:
+        rng = random.Random(seed)
+    if grade is not None:
+        closest = None
+        for attempt in range(max_attempts):
+            puzzle, solution = generate_puzzle(size, removed, True, rng=rng, pattern=pattern)
+            distance = abs(grader.grade(puzzle).level - grade)
+            if closest is None or distance < closest[0]:
+                closest = (distance, puzzle, solution)
+            if distance == 0:
+                break
+        return closest[1], closest[2]
+
+    sudoku = SudokuGenerator(size, removed, unique, rng, pattern)
     sudoku.fill_values()
-    board = sudoku.get_board()
     sudoku.remove_cells()
-    board = sudoku.get_board()
-    return board
+    return sudoku.get_packed_board(), sudoku.get_solution()
@@ -0,0 +1,48 @@
+import numpy as np
+from batch_validator import check_boards, to_array
+from sudoku_generator import generate_puzzle
+
+"""
+Tests for the vectorized batch validator
+Run with: python -m pytest test_batch_validator.py
+
+"""
+
+'''
+Returns solved boards of a size
+
+Parameters:
+row_length is the number of rows/columns of the boards
+count is the number of boards
+
+Return: list[PackedBoard]
+'''
+def solutions(row_length, count):
+    return [generate_puzzle(row_length, 0, seed=seed)[1] for seed in range(count)]
+
+def test_valid_boards():
+    boards = solutions(9, 5)
+    assert check_boards(to_array(boards)).tolist() == [True] * 5
+    assert check_boards(to_array([board.to_grid() for board in boards])).tolist() == [True] * 5
+
+def test_invalid_boards():
+    grids = to_array(solutions(9, 4)).copy()
+    # a swap inside a row keeps the rows valid but breaks two columns
+    grids[0, 0, [0, 1]] = grids[0, 0, [1, 0]]
+    # an empty cell
+    grids[1, 4, 4] = 0
+    # a value past row_length
+    grids[2, 8, 8] = 10
+    assert check_boards(grids).tolist() == [False, False, False, True]
+
+def test_empty_batch():
+    result = check_boards(to_array([]))
+    assert result.shape == (0,)
+    assert result.dtype == np.bool_
+    assert check_boards(np.zeros((0, 16, 16), np.uint8)).shape == (0,)
+
+def test_16x16_boards():
+    grids = to_array(solutions(16, 3)).copy()
+    assert check_boards(grids).tolist() == [True] * 3
+    grids[1, 15, 15] = grids[1, 15, 14]
+    assert check_boards(grids).tolist() == [True, False, True]
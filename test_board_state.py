@@ -0,0 +1,103 @@
+import copy
+import random
+from board_state import BoardState
+from save_game import pack_game, unpack_game
+
+"""
+Tests for the BoardState journal
+Run with: python -m pytest test_board_state.py
+
+"""
+
+'''
+Returns everything a move can change about a board, including the tracked counters
+
+Parameters:
+state is a BoardState
+
+Return: tuple
+'''
+def snapshot(state):
+    return copy.deepcopy((state.board, state.sketches, state.notes, state.count, state.conflicts, state.wrong,
+                          state.cand, state.singles, state.row_counts, state.col_counts, state.box_counts))
+
+'''
+Plays a random session of sketches, notes, places (right and wrong), clears, fills,
+undos, and redos
+
+Parameters:
+state is the BoardState to play on
+rng is the random.Random the moves are picked with
+steps is the number of actions
+
+Return: None
+'''
+def play(state, rng, steps):
+    n = state.row_length
+    for step in range(steps):
+        action = rng.randrange(8)
+        row, col = rng.randrange(n), rng.randrange(n)
+        value = rng.randrange(1, n + 1)
+        state.select(row, col)
+        if action == 0:
+            state.sketch(value)
+        elif action == 1:
+            state.toggle_note(value)
+        elif action == 2 and state.board[row][col] == 0:
+            # half wrong values, so fills run with conflicting singles whose order matters
+            state.place_value(row, col, state.solution[row][col] if rng.random() < 0.5 else value)
+        elif action == 3:
+            state.clear()
+        elif action == 4:
+            state.fill_singles()
+        elif action == 5:
+            state.undo()
+        elif action == 6:
+            state.redo()
+
+def test_replay_matches_redo():
+    for seed in range(10):
+        rng = random.Random(seed)
+        random.seed(seed)
+        played = BoardState(45)
+        play(played, rng, 300)
+        moves = played.journal[:played.position]
+        assert any(move.action == "fill" for move in moves)
+
+        redone = BoardState(45, puzzle=played.orig_board, solution=played.solution)
+        redone.journal = list(moves)
+        replayed = BoardState(45, puzzle=played.orig_board, solution=played.solution)
+        for k, move in enumerate(moves):
+            redone.redo()
+            replayed.replay([move])
+            assert snapshot(replayed) == snapshot(redone), "seed %d diverged at move %d (%s)" % (seed, k, move.action)
+        assert snapshot(replayed) == snapshot(played)
+        assert [move.action for move in replayed.journal] == [move.action for move in moves]
+
+def test_undo_redo_round_trip():
+    rng = random.Random(1)
+    random.seed(1)
+    state = BoardState(45)
+    original = snapshot(state)
+    play(state, rng, 300)
+    final = snapshot(state)
+    position = state.position
+    state.rewind(0)
+    assert snapshot(state) == original
+    state.rewind(position)
+    assert snapshot(state) == final
+
+def test_reset_after_load():
+    rng = random.Random(2)
+    random.seed(2)
+    played = BoardState(45)
+    play(played, rng, 100)
+    saved = unpack_game(pack_game(played, 0.0))
+    loaded = BoardState(45, puzzle=saved.puzzle, solution=saved.solution)
+    original = snapshot(loaded)
+    loaded.load_state(saved)
+    assert snapshot(loaded) == snapshot(played)
+    loaded.reset_to_original()
+    assert snapshot(loaded) == original
+    loaded.redo()
+    assert snapshot(loaded) == snapshot(played)